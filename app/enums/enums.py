@@ -12,14 +12,37 @@ class MountType(Enum):
     HOST = "host"
     NONE = "none"
 
-    @staticmethod
-    def from_str(x: str):
+    @classmethod
+    def from_str(cls, x: str):
         """
         Convert a string to a MountType enum.
         :return MountType
         """
-        for mount_type in MountType:
-            if x.upper() == mount_type.value.upper():
-                return MountType[mount_type.name]
+        # The same handful of raw strings come up again and again, so check those first
+        mount_type = _MOUNT_TYPES_BY_RAW_VALUE.get(x)
+        if mount_type is not None:
+            return mount_type
 
-        return MountType.NONE
+        mount_type = _MOUNT_TYPES_BY_VALUE.get(x.upper(), _MOUNT_TYPE_NONE)
+
+        # Keep the cache bounded in case we are fed lots of unexpected values
+        if len(_MOUNT_TYPES_BY_RAW_VALUE) >= _RAW_VALUE_CACHE_SIZE:
+            _MOUNT_TYPES_BY_RAW_VALUE.clear()
+            _MOUNT_TYPES_BY_RAW_VALUE.update(_MOUNT_TYPES_BY_EXACT_VALUE)
+        _MOUNT_TYPES_BY_RAW_VALUE[x] = mount_type
+
+        return mount_type
+
+
+# Fallback member, bound once so lookups don't go through the enum's attribute access
+_MOUNT_TYPE_NONE = MountType.NONE
+
+# Lookup of upper-cased enum values to their members, built once at import time
+_MOUNT_TYPES_BY_VALUE: dict[str, MountType] = {mount_type.value.upper(): mount_type for mount_type in MountType}
+
+# Lookup of the exact enum values, the strings we see in the fstab and mounts file
+_MOUNT_TYPES_BY_EXACT_VALUE: dict[str, MountType] = {mount_type.value: mount_type for mount_type in MountType}
+
+# Cache of raw (not upper-cased) strings we have already resolved, starting with the exact values
+_RAW_VALUE_CACHE_SIZE = 64
+_MOUNT_TYPES_BY_RAW_VALUE: dict[str, MountType] = dict(_MOUNT_TYPES_BY_EXACT_VALUE)
@@ -1,17 +1,47 @@
+import atexit
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from types import MappingProxyType
 
-from tabulate import tabulate
+
+class _CachedTimeFormatter(logging.Formatter):
+    """
+    A formatter that reuses the formatted timestamp for records created within the same second,
+    our date format has no sub-second part so there's no need to call strftime for every record.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cached_second = None
+        self._cached_time = None
+
+    def formatTime(self, record, datefmt=None):
+        second = int(record.created)
+        if second != self._cached_second:
+            self._cached_time = super().formatTime(record, datefmt)
+            self._cached_second = second
+        return self._cached_time
 
 
 class LogFacade:
     """
     A facade for logging operations, providing a consistent interface for logging messages
-    Note: we use stacklevel=2 to ensure the correct file and line number are logged, otherwise the log will point to the
-    LogFacade method that called the logger method.
+    Note: our log format does not include the file, line number or process/thread details, so we turn off the
+    collection of the process/thread details and don't pass a stacklevel for the caller lookup.
     """
-    _loggers = {
+    __slots__ = ()
+
+    # Read-only, the set of loggers is fixed
+    _loggers = MappingProxyType({
         "application": logging.getLogger(__name__),
-    }
+    })
+
+    # The application logger is used by almost every call, so keep a direct reference to it
+    _default_logger = _loggers["application"]
+
+    # Background listener that writes queued log records to the real handlers
+    _listener: QueueListener = None
 
     @staticmethod
     def disable_logging():
@@ -26,6 +56,11 @@ class LogFacade:
         Set up a basic logging configuration with a consistent format and default level.
         """
 
+        # Skip the process/thread lookups, none of them are used by our format
+        logging.logThreads = False
+        logging.logProcesses = False
+        logging.logMultiprocessing = False
+
         if null_handler:
             # Set a null handler to prevent any logging from being output
             null_logger = logging.getLogger()
@@ -33,50 +68,67 @@ class LogFacade:
             null_logger.addHandler(logging.NullHandler())
             return
 
+        # Don't attach a second set of handlers if the logger has already been configured
+        app_logger = LogFacade._default_logger
+        if app_logger.handlers:
+            return
+
         # Set up a formatter
-        formatter = logging.Formatter(
+        formatter = _CachedTimeFormatter(
             fmt="%(asctime)s | %(levelname)s | %(message)s",
             datefmt="%d-%m-%Y %H:%M:%S",
         )
 
-        # Set up a handler for the application logger
+        # Set up a stream handler, this is run on a background thread by the queue listener
         handler = logging.StreamHandler()
         handler.setFormatter(formatter)
 
-        # Set the level and add the handler to the application logger
-        app_logger = LogFacade._loggers["application"]
+        # Log calls only put records on the queue, the listener does the actual writing
+        log_queue = queue.SimpleQueue()
+        LogFacade._listener = QueueListener(log_queue, handler, respect_handler_level=True)
+        LogFacade._listener.start()
+
+        # Make sure any queued records are written before the application exits
+        atexit.register(LogFacade._listener.stop)
+
+        # Set the level and add the queue handler to the application logger
         app_logger.setLevel(level)
-        app_logger.addHandler(handler)
+        app_logger.addHandler(QueueHandler(log_queue))
 
     @staticmethod
-    def info(message: any, logger: str = "application"):
+    def info(message: any, *args, logger: str = "application"):
         """Log an INFO level message."""
-        LogFacade._get_logger(logger).info(message, stacklevel=2)
+        LogFacade._get_logger(logger).info(message, *args)
 
     @staticmethod
-    def log(level, message: any, logger: str = "application"):
-        """Log an INFO level message."""
-        LogFacade._get_logger(logger).log(level, message, stacklevel=2)
+    def log(level, message: any, *args, logger: str = "application"):
+        """Log a message at the given level."""
+        LogFacade._get_logger(logger).log(level, message, *args)
 
     @staticmethod
-    def warning(message: any, logger: str = "application"):
+    def is_enabled_for(level, logger: str = "application") -> bool:
+        """Return True if a message at the given level would be logged."""
+        return LogFacade._get_logger(logger).isEnabledFor(level)
+
+    @staticmethod
+    def warning(message: any, *args, logger: str = "application"):
         """Log a WARNING level message."""
-        LogFacade._get_logger(logger).warning(message, stacklevel=2)
+        LogFacade._get_logger(logger).warning(message, *args)
 
     @staticmethod
-    def error(message: any, logger: str = "application"):
+    def error(message: any, *args, logger: str = "application"):
         """Log an ERROR level message."""
-        LogFacade._get_logger(logger).error(message, stacklevel=2)
+        LogFacade._get_logger(logger).error(message, *args)
 
     @staticmethod
-    def debug(message: any, logger: str = "application"):
+    def debug(message: any, *args, logger: str = "application"):
         """Log a DEBUG level message."""
-        LogFacade._get_logger(logger).debug(message, stacklevel=2)
+        LogFacade._get_logger(logger).debug(message, *args)
 
     @staticmethod
-    def critical(message: any, logger: str = "application"):
+    def critical(message: any, *args, logger: str = "application"):
         """Log a CRITICAL level message."""
-        LogFacade._get_logger(logger).critical(message, stacklevel=2)
+        LogFacade._get_logger(logger).critical(message, *args)
 
     @staticmethod
     def _get_logger(logger_name: str) -> logging.Logger:
@@ -92,15 +144,23 @@ class LogFacade:
         Raises:
             KeyError: If the logger name is invalid.
         """
-        if logger_name not in LogFacade._loggers:
+        if logger_name == "application":
+            return LogFacade._default_logger
+
+        try:
+            return LogFacade._loggers[logger_name]
+        except KeyError:
             raise KeyError(
                 f"Logger '{logger_name}' not found. Available loggers: {list(LogFacade._loggers.keys())}"
-            )
-        return LogFacade._loggers[logger_name]
+            ) from None
 
     @staticmethod
     def log_table(level, title: str, headers: list[str], table: list[list[str]]):
 
+        # Skip building the table entirely if the level is disabled
+        if not LogFacade.is_enabled_for(level):
+            return
+
         # Format the table
         table_with_title = LogFacade.format_table(title, headers, table)
 
@@ -117,7 +177,34 @@ class LogFacade:
 
     @staticmethod
     def format_table(title: str, headers: list[str], table: list[list[str]]) -> str:
-        formatted_table = tabulate(table, headers=headers, tablefmt="grid")
+        # Convert every cell to a string up front (None is shown as an empty cell)
+        headers = [str(header) for header in headers]
+        rows = [["" if cell is None else str(cell) for cell in row] for row in table]
+
+        # Pad short rows (and the headers, if a row is longer than them) with empty cells, like tabulate
+        column_count = max([len(headers), *(len(row) for row in rows)])
+        headers += [""] * (column_count - len(headers))
+        for row in rows:
+            row += [""] * (column_count - len(row))
+
+        # Work out the width of each column
+        widths = [len(header) for header in headers]
+        for row in rows:
+            for i, cell in enumerate(row):
+                widths[i] = max(widths[i], len(cell))
+
+        # Draw the table in a grid
+        separator = "+" + "+".join("-" * (width + 2) for width in widths) + "+"
+        header_separator = "+" + "+".join("=" * (width + 2) for width in widths) + "+"
+
+        def format_row(cells: list[str]) -> str:
+            return "| " + " | ".join(cell.ljust(width) for cell, width in zip(cells, widths)) + " |"
+
+        lines = [separator, format_row(headers), header_separator]
+        for row in rows:
+            lines.append(format_row(row))
+            lines.append(separator)
+        formatted_table = "\n".join(lines)
 
         # Add a title to the table
         return f"\n\n{title}\n{'=' * len(title)}\n{formatted_table}\n"
@@ -1,32 +1,60 @@
 from app.enums.enums import MountType
 from app.models.mount import Mount
 
+# Mounts are immutable, so the defaults can be shared rather than rebuilt on every call
+_WINDOWS_DEFAULT = Mount(
+    mount_path="/shares/windows",
+    actual_path="//windowsServer/share",
+    mount_type=MountType.WINDOWS
+)
+_LINUX_DEFAULT = Mount(
+    mount_path="/shares/linux",
+    actual_path="/mnt/linux",
+    mount_type=MountType.LINUX
+)
+_STANDARD_DEFAULT = Mount(
+    mount_path="/shares/standard",
+    actual_path="/mnt/standard",
+    mount_type=MountType.NONE
+)
+
 
 class FakeMountFactory:
     """
     Used for creating fake Mount objects for testing
     """
 
+    __slots__ = ()
+
     @staticmethod
     def windows_mount(mount_path: str = None, actual_path: str = None) -> Mount:
+        if mount_path is None and actual_path is None:
+            return _WINDOWS_DEFAULT
+
         return Mount(
-            mount_path=mount_path or "/shares/windows",
-            actual_path=actual_path or "//windowsServer/share",
+            mount_path=mount_path or _WINDOWS_DEFAULT.mount_path,
+            actual_path=actual_path or _WINDOWS_DEFAULT.actual_path,
             mount_type=MountType.WINDOWS
         )
 
     @staticmethod
     def linux_mount(mount_path: str = None, actual_path: str = None) -> Mount:
+        if mount_path is None and actual_path is None:
+            return _LINUX_DEFAULT
+
         return Mount(
-            mount_path=mount_path or "/shares/linux",
-            actual_path=actual_path or "/mnt/linux",
+            mount_path=mount_path or _LINUX_DEFAULT.mount_path,
+            actual_path=actual_path or _LINUX_DEFAULT.actual_path,
             mount_type=MountType.LINUX
         )
 
     @staticmethod
     def standard_mount(mount_path: str = None, actual_path: str = None) -> Mount:
+        if mount_path is None and actual_path is None:
+            return _STANDARD_DEFAULT
+
         return Mount(
-            mount_path=mount_path or "/shares/standard",
-            actual_path=actual_path or "/mnt/standard",
+            mount_path=mount_path or _STANDARD_DEFAULT.mount_path,
+            actual_path=actual_path or _STANDARD_DEFAULT.actual_path,
             mount_type=MountType.NONE
         )
@@ -1,15 +1,22 @@
-from pyfstab import Entry
-
 from app.enums.enums import MountType
 from app.models.mount import Mount
 
 
 class MountFactory:
 
+    __slots__ = ()
+
+    # Mount and MountType.from_str are bound as default arguments so they are local
+    # lookups, these methods are called once for every fstab line / desired mount
+
     @staticmethod
-    def create_from_fstab_entry(entry: Entry) -> Mount:
-        return Mount(entry.dir, entry.device, MountType.from_str(entry.type))
+    def create_many_from_fstab_fields(
+        fields: list[tuple[str, str, str]], _mount=Mount, _from_str=MountType.from_str
+    ) -> list[Mount]:
+        # Each item is the (device, dir, type) of an fstab line
+        return [_mount(mount_dir, device, _from_str(mount_type)) for device, mount_dir, mount_type in fields]
 
     @staticmethod
-    def create_from_json(data: dict) -> Mount:
-        return Mount(data["mount_path"], data["actual_path"], MountType.from_str(data["mount_type"]))
+    def create_many_from_json(items: list[dict], _mount=Mount, _from_str=MountType.from_str) -> list[Mount]:
+        # Build them all in one comprehension, rather than a call per desired mount
+        return [_mount(data["mount_path"], data["actual_path"], _from_str(data["mount_type"])) for data in items]
@@ -1,44 +1,60 @@
-from abc import ABC, abstractmethod
+from typing import Callable
 
 
-class FileSystemRepositoryInterface(ABC):
+class FileSystemRepositoryInterface:
 
-    @abstractmethod
     def read_file(self, file_path: str) -> str:
         """Read the contents of a file"""
-        pass
+        raise NotImplementedError
+
+    def read_file_bytes(self, file_path: str) -> bytes:
+        """Read the raw contents of a file, for parsers that take bytes directly"""
+        return self.read_file(file_path).encode("utf-8")
+
+    def read_file_cached(self, file_path: str) -> str:
+        """Read the contents of a file, implementations may reuse a previous read if the file is unchanged"""
+        return self.read_file(file_path)
+
+    def read_procfile(self, file_path: str) -> str:
+        """Read the contents of a small kernel generated file such as /proc/mounts"""
+        return self.read_file(file_path)
 
-    @abstractmethod
     def write_file(self, file_path: str, content: str):
         """Write content to a file"""
-        pass
+        raise NotImplementedError
+
+    def rewrite_file(self, file_path: str, transform: Callable[[str], str]) -> bool:
+        """Replace the contents of a file with transform(contents), returning True if the file changed"""
+        raise NotImplementedError
+
+    def append_lines(self, file_path: str, lines: list[str]):
+        """Append lines to the end of a file"""
+        raise NotImplementedError
 
-    @abstractmethod
     def remove_file(self, file_path: str):
         """Remove a file"""
-        pass
+        raise NotImplementedError
 
-    @abstractmethod
     def file_exists(self, file_path: str) -> bool:
         """Return True if the file exists"""
-        pass
+        raise NotImplementedError
 
-    @abstractmethod
     def create_directory(self, directory_path: str):
         """Create a directory"""
-        pass
+        raise NotImplementedError
 
-    @abstractmethod
     def remove_directory(self, directory_path: str):
         """Remove a directory"""
-        pass
+        raise NotImplementedError
 
-    @abstractmethod
     def directory_exists(self, directory_path: str) -> bool:
         """Return True if the directory exists"""
-        pass
+        raise NotImplementedError
 
-    @abstractmethod
     def directory_empty(self, directory_path: str) -> bool:
         """Return True if the directory is empty"""
-        pass
+        raise NotImplementedError
+
+    def probe_directory(self, directory_path: str) -> tuple[bool, bool]:
+        """Return (exists, empty) for a directory, implementations may answer both with a single check"""
+        return self.directory_exists(directory_path), self.directory_empty(directory_path)
@@ -1,44 +1,56 @@
-from abc import ABC, abstractmethod
-
 from app.models.mount import Mount
 
 
-class MountConfigRepositoryInterface(ABC):
+class MountConfigRepositoryInterface:
     """
     Interface for a mount config repository, which is responsible for
     storing persistent mount config / info e.g (FSTAB)
     """
 
-    @abstractmethod
     def store_mount_information(self, mount: Mount):
         """Save this mount information to the the system"""
-        pass
+        raise NotImplementedError
+
+    def store_mount_information_many(self, mounts: list[Mount]):
+        """Save information for several mounts to the system"""
+        for mount in mounts:
+            self.store_mount_information(mount)
 
-    @abstractmethod
     def remove_mount_information(self, mount_path: str):
         """Remove this mount information from the system"""
-        pass
+        raise NotImplementedError
 
-    @abstractmethod
     def get_all_system_mounts(self) -> list[Mount]:
         """Get all mount information from the system"""
-        pass
+        raise NotImplementedError
+
+    def get_system_mounts_with_prefix(self, prefix: str) -> list[Mount]:
+        """Get the mount information from the system for mounts whose mount path starts with prefix"""
+        return [mount for mount in self.get_all_system_mounts() if mount.mount_path.startswith(prefix)]
 
-    @abstractmethod
     def is_mounted(self, mount_path: str) -> bool:
         """Return True if the mount is currently mounted"""
-        pass
+        raise NotImplementedError
+
+    def is_mounted_many(self, mount_paths: list[str]) -> dict[str, bool]:
+        """Return a dict of mount path -> True if the mount is currently mounted"""
+        return {mount_path: self.is_mounted(mount_path) for mount_path in mount_paths}
 
-    @abstractmethod
     def remove_mounts(self, mounts: list[Mount]):
         """
         Remove a list of mounts from the system
         """
-        pass
+        raise NotImplementedError
+
+    def replace_mounts(self, mounts: list[Mount]):
+        """
+        Replace the mount information for the given mount paths with these mounts
+        """
+        self.remove_mounts(mounts)
+        self.store_mount_information_many(mounts)
 
-    @abstractmethod
     def cleanup(self):
         """
         Cleanup the mount information from the system
         """
-        pass
+        raise NotImplementedError
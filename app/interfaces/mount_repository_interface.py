@@ -1,54 +1,75 @@
-from abc import ABC, abstractmethod
-
 from app.models.mount import Mount
 
 
-class MountRepositoryInterface(ABC):
+class MountRepositoryInterface:
     """
     Interface for a mount repository, which is responsible for
     providing the application with mounts to work with
     """
 
-    @abstractmethod
     def get_desired_mounts(self) -> list[Mount]:
         """Fetch a list of mounts we want on the system"""
-        pass
+        raise NotImplementedError
 
-    @abstractmethod
     def get_current_mounts(self) -> list[Mount]:
         """Fetch a list of mounts currently on the system"""
-        pass
+        raise NotImplementedError
 
-    @abstractmethod
     def get_orphan_mounts(self) -> list[Mount]:
         """Fetch a list of mounts that are not present in config but are mounted on the system"""
-        pass
+        raise NotImplementedError
+
+    def get_current_and_orphan_mounts(self) -> tuple[list[Mount], list[Mount]]:
+        """Fetch the current mounts and the orphan mounts together, implementations may share the work"""
+        return self.get_current_mounts(), self.get_orphan_mounts()
 
-    @abstractmethod
     def mount(self, mount: Mount):
         """
         mount a mount to the system
         :param mount: the mount to mount on the system
         """
-        pass
+        raise NotImplementedError
+
+    def mount_many(self, mounts: list[Mount]) -> list[Mount]:
+        """
+        mount several mounts to the system
+        :param mounts: the mounts to mount on the system
+        :return A list of mounts that failed to mount
+        """
+        raise NotImplementedError
 
-    @abstractmethod
     def unmount(self, mount_path: str):
         """
         unmount a mount from the system
         :param mount_path: the path of the mount to unmount on the system
         """
-        pass
+        raise NotImplementedError
+
+    def unmount_many(self, mounts: list[Mount]) -> list[Mount]:
+        """
+        unmount several mounts from the system
+        :param mounts: the mounts to unmount from the system
+        :return A list of mounts that failed to unmount
+        """
+        raise NotImplementedError
+
+    def update_many(self, mounts: list[Mount]) -> list[Mount]:
+        """
+        update several mounts on the system, replacing the mounts at the same mount paths
+        :param mounts: the new mounts
+        :return A list of mounts that failed to update
+        """
+        raise NotImplementedError
 
-    @abstractmethod
     def unmount_all(self) -> list[Mount]:
         """
         unmount all mounts from the system
         :return A list of mounts that failed to unmount
         """
-        pass
+        raise NotImplementedError
 
     def cleanup(self):
         """
         Cleanup the system
         """
+        raise NotImplementedError
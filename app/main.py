@@ -10,23 +10,32 @@ from app.util.config import ConfigManager
 from app.util.message import MESSAGE, DRY_RUN, CLEANUP, UNMOUNT_ALL
 
 
-def _setup_logger():
-    """
-    Set up the logger facade
-    """
-    LogFacade.configure_logger()
+# The config manager loaded on the first call to _setup_logger_and_config
+_config_manager: ConfigManager = None
 
 
-def _setup_config() -> ConfigManager:
+def _setup_logger_and_config() -> ConfigManager:
     """
     Set up the logger and load the configuration.
+    This is only done once, later calls return the config manager that was already loaded.
     """
+    global _config_manager
+
+    if _config_manager is not None:
+        return _config_manager
+
+    # Set up the logger facade
+    LogFacade.configure_logger()
 
     # Initialize a config manager and load the configuration from the environment
     config_manager = ConfigManager()
     config_manager.load_from_env()
-    LogFacade.info(config_manager)
 
+    # The config includes the credentials file, SSH user and domain, so it is only shown when debugging.
+    # The table is only built if DEBUG is enabled
+    LogFacade.debug(config_manager)
+
+    _config_manager = config_manager
     return config_manager
 
 
@@ -59,15 +68,18 @@ def _handle_status(status, success_message, failure_message):
         exit(1)
 
 
-def _run(message: str, config_manager: ConfigManager, callback: Callable):
-
-    _setup_logger()
+def _run(config_manager: ConfigManager, callback: Callable, mode: str = "", banner: str = ""):
+    """
+    Validate the environment and run the callback.
+    :param mode: Shown after the app name in the welcome message e.g "[DRY RUN] "
+    :param banner: Shown after the welcome message to describe the operation
+    """
 
     # Setup a validation service
     validation_service = ValidationService(config_manager, FileSystemRepository())
 
-    # Print the welcome message
-    LogFacade.info(message)
+    # Print the welcome message (only formatted if INFO is enabled)
+    LogFacade.info("Starting Mounty Python %s%s%s", mode, MESSAGE, banner)
 
     # Run the validation service
     status = validation_service.validate()
@@ -86,13 +98,13 @@ def main(dry_run=False):
     """
     Script entry point
     """
-    message = "Starting Mounty Python [DRY RUN] " + MESSAGE + DRY_RUN if dry_run else "Starting Mounty Python " + MESSAGE
-
-    config_manager = _setup_config()
+    config_manager = _setup_logger_and_config()
     mounting_service = _get_mounting_service(config_manager)
-    callback = mounting_service.dry_run if dry_run else mounting_service.run
 
-    _run(message, config_manager, callback)
+    if dry_run:
+        _run(config_manager, mounting_service.dry_run, "[DRY RUN] ", DRY_RUN)
+    else:
+        _run(config_manager, mounting_service.run)
 
 
 def unmount_all():
@@ -100,12 +112,10 @@ def unmount_all():
     Unmount all mounts from the system (not system mounts).
     """
 
-    message = "Starting Mounty Python (REMOVE ALL MOUNTS) " + MESSAGE + UNMOUNT_ALL
-
-    config_manager = _setup_config()
+    config_manager = _setup_logger_and_config()
     mounting_service = _get_mounting_service(config_manager)
 
-    _run(message, config_manager, mounting_service.unmount_all)
+    _run(config_manager, mounting_service.unmount_all, "(REMOVE ALL MOUNTS) ", UNMOUNT_ALL)
 
 
 def cleanup():
@@ -113,12 +123,10 @@ def cleanup():
     Cleanup the fstab file.
     """
 
-    message = "Starting Mounty Python [CLEANUP] " + MESSAGE + CLEANUP
-
-    config_manager = _setup_config()
+    config_manager = _setup_logger_and_config()
     mounting_service = _get_mounting_service(config_manager)
 
-    _run(message, config_manager, mounting_service.cleanup)
+    _run(config_manager, mounting_service.cleanup, "[CLEANUP] ", CLEANUP)
 
 
 if __name__ == "__main__":
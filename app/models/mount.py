@@ -1,10 +1,9 @@
-import re
 from dataclasses import dataclass
 
 from app.enums.enums import MountType
 
 
-@dataclass(order=True)
+@dataclass(frozen=True, slots=True)
 class Mount:
     """
     A mount is made up of...
@@ -21,5 +20,14 @@ class Mount:
         Compare two mounts
         :param other: Another mount
         """
+        if not isinstance(other, Mount):
+            return NotImplemented
+
         return ((self.mount_path == other.mount_path)
                 and (self.actual_path == other.actual_path and self.mount_type == other.mount_type))
+
+    def __hash__(self) -> int:
+        """
+        Hash a mount using the same fields we compare on, so mounts can be used in sets / as dict keys
+        """
+        return hash((self.mount_path, self.actual_path, self.mount_type))
@@ -1,34 +1,205 @@
+import errno
+import mmap
 import os
 import shutil
+import stat
+import tempfile
+from typing import Callable
 
 from app.interfaces.file_sytem_repository_interface import FileSystemRepositoryInterface
 
+# Buffer size used when writing files
+_WRITE_BUFFER_SIZE = 1 << 16
+
+# Files at least this big are memory mapped when read, below this a plain read is cheaper
+_MMAP_THRESHOLD = 1 << 16
+
+# Bytes requested per read of a /proc file
+_PROC_READ_SIZE = 1 << 16
+
+# Permissions given to newly created files
+_DEFAULT_FILE_MODE = 0o644
+
 
 class FileSystemRepository(FileSystemRepositoryInterface):
 
+    def __init__(self):
+        # Contents of files we have read or written, keyed by path -> ((mtime_ns, size), content)
+        self._file_cache: dict[str, tuple[tuple[int, int], str]] = {}
+
     def read_file(self, file_path: str) -> str:
         """
-        Read the contents of a file
+        Read the contents of a file.
+        The whole file is read as bytes and decoded once, rather than going through a text wrapper
         """
-        with open(file_path, "r") as f:
+        with open(file_path, "rb") as f:
+            # Large files are decoded straight from a memory map, skipping the copy into a bytes object
+            if os.fstat(f.fileno()).st_size >= _MMAP_THRESHOLD:
+                with mmap.mmap(f.fileno(), 0, prot=mmap.PROT_READ) as mapped:
+                    return str(mapped, "utf-8")
+            return f.read().decode("utf-8")
+
+    def read_file_bytes(self, file_path: str) -> bytes:
+        """
+        Read the raw contents of a file without decoding them, the JSON parsers take bytes directly
+        """
+        with open(file_path, "rb") as f:
             return f.read()
 
+    def _is_cached_content(self, file_path: str, content: str) -> bool:
+        """
+        Return True if the cached contents of the file match content and the file hasn't changed since
+        """
+        cached = self._file_cache.get(file_path)
+        if cached is None or cached[1] != content:
+            return False
+
+        try:
+            stat_result = os.stat(file_path)
+        except FileNotFoundError:
+            return False
+        return cached[0] == (stat_result.st_mtime_ns, stat_result.st_size)
+
+    def read_file_cached(self, file_path: str) -> str:
+        """
+        Read the contents of a file, reusing the last read if the file hasn't changed since.
+        Files that report a size of 0 (e.g /proc files) are never cached.
+        """
+        stat_result = os.stat(file_path)
+        key = (stat_result.st_mtime_ns, stat_result.st_size)
+
+        cached = self._file_cache.get(file_path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        content = self.read_file(file_path)
+        if stat_result.st_size:
+            self._file_cache[file_path] = (key, content)
+        return content
+
+    def read_procfile(self, file_path: str) -> str:
+        """
+        Read the contents of a small kernel generated file such as /proc/mounts.
+        Uses raw os.read calls, skipping the buffering and text wrapping of open()
+        """
+        chunks = []
+        fd = os.open(file_path, os.O_RDONLY)
+        try:
+            while chunk := os.read(fd, _PROC_READ_SIZE):
+                chunks.append(chunk)
+        finally:
+            os.close(fd)
+        return b"".join(chunks).decode("utf-8", "replace")
+
     def write_file(self, file_path: str, content: str):
         """
-        Write content to a file
+        Write content to a file atomically, so a failed write never leaves a half written file behind.
+        Falls back to writing the file in place when it can't be replaced without changing its owner,
+        or when we can't create files in its directory.
+        Nothing is written if we know the file already holds this content
+        """
+        if self._is_cached_content(file_path, content):
+            return
+
+        # Write to where a symlink points, so the link itself is kept rather than replaced with a plain file
+        target_path = os.path.realpath(file_path)
+
+        # Keep the permissions and ownership of the file we are replacing (mkstemp creates files as 0600)
+        try:
+            original_stat = os.stat(target_path)
+        except FileNotFoundError:
+            original_stat = None
+        mode = stat.S_IMODE(original_stat.st_mode) if original_stat else _DEFAULT_FILE_MODE
+
+        # A replacement file belongs to us, and only root can give it back to another owner
+        owner = (original_stat.st_uid, original_stat.st_gid) if original_stat else None
+        change_owner = owner is not None and owner != (os.geteuid(), os.getegid())
+        if change_owner and os.geteuid() != 0:
+            stat_result = self._write_file_in_place(target_path, content)
+        else:
+            try:
+                stat_result = self._replace_file(target_path, content, mode, owner if change_owner else None)
+            except PermissionError:
+                # We may be able to write the file but not create files next to it, e.g. in /etc
+                stat_result = self._write_file_in_place(target_path, content)
+
+        # Keep the cache in step with what we just wrote
+        self._file_cache[file_path] = ((stat_result.st_mtime_ns, stat_result.st_size), content)
+
+    @staticmethod
+    def _replace_file(file_path: str, content: str, mode: int, owner: tuple[int, int] | None) -> os.stat_result:
+        """
+        Write to a temporary file next to the target, then swap it into place.
+        It is synced first, so a crash can't leave an empty file where the old one was
+        :param owner: The (uid, gid) to give the new file, or None to leave it as ours
+        :return: The stat of the new file
+        """
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(file_path))
+        try:
+            with os.fdopen(fd, "w", buffering=_WRITE_BUFFER_SIZE, encoding="utf-8") as f:
+                # Chown before chmod, as changing the owner can clear some mode bits
+                if owner:
+                    os.fchown(fd, *owner)
+                os.fchmod(fd, mode)
+                f.write(content)
+                f.flush()
+                os.fsync(fd)
+                stat_result = os.fstat(fd)
+
+            os.replace(temp_path, file_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+        return stat_result
+
+    @staticmethod
+    def _write_file_in_place(file_path: str, content: str) -> os.stat_result:
+        """
+        Truncate and write the file itself, keeping its owner and permissions as they are
+        :return: The stat of the written file
         """
-        with open(file_path, "w") as f:
+        with open(file_path, "w", buffering=_WRITE_BUFFER_SIZE, encoding="utf-8") as f:
             f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+            return os.fstat(f.fileno())
+
+    def rewrite_file(self, file_path: str, transform: Callable[[str], str]) -> bool:
+        """
+        Replace the contents of a file with transform(contents).
+        The file is only written if the contents actually change
+        :return: True if the file was written
+        """
+        content = self.read_file_cached(file_path)
+        new_content = transform(content)
+
+        if new_content == content:
+            return False
+
+        self.write_file(file_path, new_content)
+        return True
+
+    def append_lines(self, file_path: str, lines: list[str]):
+        """
+        Append lines to the end of a file, without reading or rewriting what is already there
+        """
+        with open(file_path, "a", buffering=_WRITE_BUFFER_SIZE, encoding="utf-8") as f:
+            f.write("".join(f"{line}\n" for line in lines))
+
+        # The cached contents are now out of date
+        self._file_cache.pop(file_path, None)
 
     def remove_file(self, file_path: str):
         """
         Remove a file
         """
         os.remove(file_path)
+        self._file_cache.pop(file_path, None)
 
     def file_exists(self, file_path: str) -> bool:
         """
-        Return True if the file exists
+        Return True if the file exists, any kind of file counts and symlinks are followed
         """
         return os.path.exists(file_path)
 
@@ -42,11 +213,18 @@ class FileSystemRepository(FileSystemRepositoryInterface):
         """
         Remove a directory
         """
-        shutil.rmtree(directory_path)
+        # Mount points are almost always empty, and a single rmdir removes an empty directory.
+        # Only walk the tree if there is something in it
+        try:
+            os.rmdir(directory_path)
+        except OSError as e:
+            if e.errno not in (errno.ENOTEMPTY, errno.EEXIST):
+                raise
+            shutil.rmtree(directory_path)
 
     def directory_exists(self, directory_path: str) -> bool:
         """
-        Return True if the directory exists
+        Return True if the directory exists, like file_exists any kind of file counts
         """
         return os.path.exists(directory_path)
 
@@ -54,6 +232,19 @@ class FileSystemRepository(FileSystemRepositoryInterface):
         """
         Return True if the directory is empty
         """
-        if self.directory_exists(directory_path):
-            return not os.listdir(directory_path)
-        return True
+        try:
+            # Stop at the first entry rather than listing the whole directory
+            with os.scandir(directory_path) as entries:
+                return next(entries, None) is None
+        except FileNotFoundError:
+            return True
+
+    def probe_directory(self, directory_path: str) -> tuple[bool, bool]:
+        """
+        Return (exists, empty) for a directory from a single scandir, rather than a stat and then a scandir
+        """
+        try:
+            with os.scandir(directory_path) as entries:
+                return True, next(entries, None) is None
+        except FileNotFoundError:
+            return False, True
@@ -1,3 +1,5 @@
+import sys
+
 from pyfstab import Fstab, Entry
 
 from app.enums.enums import MountType
@@ -8,6 +10,12 @@ from app.models.mount import Mount
 from app.interfaces.file_sytem_repository_interface import FileSystemRepositoryInterface
 from app.util.config import ConfigManager
 
+# Replacements made when sanitizing a path, spaces are escaped for the fstab
+_PATH_TRANSLATION = str.maketrans({"\n": None, "\r": None, "\\": "/", " ": "\\040"})
+
+# The fstab type of each mount type
+_MOUNT_TYPE_STR = {mount_type: str(mount_type.value) for mount_type in MountType}
+
 
 class FstabRepository(MountConfigRepositoryInterface):
     """
@@ -25,18 +33,48 @@ class FstabRepository(MountConfigRepositoryInterface):
         self.fstab_location = self.config_manager.get_config("FSTAB_LOCATION")
         self.proc_mounts_location = self.config_manager.get_config("PROC_MOUNTS_LOCATION")
 
-    def _read_fstab(self) -> Fstab:
+        # The last fstab content we parsed and its entries, so unchanged content isn't parsed again
+        self._parsed_content: str | None = None
+        self._parsed_entries: tuple[Entry, ...] = ()
+
+        # The mount options only depend on config, so build them once rather than for every mount
+        cifs_file_location = self.config_manager.get_config("CIFS_FILE_LOCATION")
+        cifs_domain = self.config_manager.get_config("CIFS_DOMAIN")
+        linux_ssh_location = self.config_manager.get_config("LINUX_SSH_LOCATION")
+        self._options_by_type = {
+            MountType.WINDOWS: f"credentials={cifs_file_location},domain={cifs_domain},uid=1001,gid=5001,auto",
+            MountType.LINUX: f"IdentityFile={linux_ssh_location},uid=1001,gid=5001,auto"
+        }
+
+    def _read_fstab_raw(self) -> Fstab:
         """
-        Read the contents of the fstab file
+        Read the contents of the fstab file, without removing duplicates.
+        Only the write paths need duplicates removed, and they do that when writing
         :return Fstab: The fstab file object
         """
-        fstab = Fstab().read_string(
-            self.fs_repository.read_file(self.fstab_location)
+        return self._parse_fstab(
+            self.fs_repository.read_file_cached(self.fstab_location)
         )
 
-        # Remove any duplicates
-        fstab.entries = self._remove_duplicates(fstab.entries)
+    def _parse_fstab(self, content: str) -> Fstab:
+        """
+        Parse fstab content, reusing the entries from the last parse if the content hasn't changed.
+        A new Fstab is returned each time, so callers are free to change its entries
+        """
+        if content != self._parsed_content:
+            entries = Fstab().read_string(content).entries
+
+            # The same devices / dirs / types come up again and again, so intern them once here
+            for entry in entries:
+                entry.device = sys.intern(entry.device)
+                entry.dir = sys.intern(entry.dir)
+                entry.type = sys.intern(entry.type)
 
+            self._parsed_entries = tuple(entries)
+            self._parsed_content = content
+
+        fstab = Fstab()
+        fstab.entries = list(self._parsed_entries)
         return fstab
 
     def _write_fstab(self, fstab: Fstab):
@@ -57,111 +95,222 @@ class FstabRepository(MountConfigRepositoryInterface):
         keep = []
 
         # Store the device and dir of each entry
-        seen: list[tuple] = []
+        seen: set[tuple[str, str]] = set()
 
         for entry in entries:
-            if (entry.device, entry.dir) not in seen:
-                seen.append((entry.device, entry.dir))
+            key = (entry.device, entry.dir)
+            if key not in seen:
+                seen.add(key)
                 keep.append(entry)
         return keep
 
-    def _read_proc_mounts(self) -> Fstab:
+    def _read_proc_mounts(self) -> list[tuple[str, str]]:
         """
-        Read the contents of the proc mounts file
+        Read the device and dir of each entry in the proc mounts file.
+        The file is simple whitespace separated columns, so split the lines rather than building fstab entries
         """
-
-        return Fstab().read_string(
-            self.fs_repository.read_file(self.proc_mounts_location)
-        )
+        proc_mounts = []
+        for line in self.fs_repository.read_procfile(self.proc_mounts_location).splitlines():
+            fields = line.split(None, 2)
+            if len(fields) > 1 and not fields[0].startswith("#"):
+                proc_mounts.append((fields[0], fields[1]))
+        return proc_mounts
 
     def _sanitize_path(self, path: str) -> str:
-        replacements = {"\n": "", "\r": "", "\\": "/", " ": "\\040"}
-        for old, new in replacements.items():
-            path = path.replace(old, new)
-        return path
+        # Strip new lines, convert backslashes and escape spaces in one pass
+        return path.translate(_PATH_TRANSLATION)
 
     def _generate_mount_options(self, mount: Mount) -> str:
-        if mount.mount_type == MountType.WINDOWS:
-            cifs_file_location = self.config_manager.get_config("CIFS_FILE_LOCATION")
-            cifs_domain = self.config_manager.get_config("CIFS_DOMAIN")
-            return f"credentials={cifs_file_location},domain={cifs_domain},uid=1001,gid=5001,auto"
-        elif mount.mount_type == MountType.LINUX:
-            linux_ssh_location = self.config_manager.get_config("LINUX_SSH_LOCATION")
-            return f"IdentityFile={linux_ssh_location},uid=1001,gid=5001,auto"
-        else:
-            raise MountException(f"Mount type {mount.mount_type} not supported")
+        try:
+            return self._options_by_type[mount.mount_type]
+        except KeyError:
+            raise MountException(f"Mount type {mount.mount_type} not supported") from None
 
-    def _filter_entries(self, entries: list[Entry], condition) -> list[Entry]:
+    def _line_dir(self, line: str) -> str | None:
         """
-        Filter a list of entries based on a condition
+        Return the mount directory of an fstab line, or None if the line isn't an entry
         """
-        return [entry for entry in entries if condition(entry)]
+        fields = line.split(None, 2)
+        if len(fields) < 2 or fields[0].startswith("#"):
+            return None
+        return fields[1]
 
-    def store_mount_information(self, mount: Mount):
+    def _remove_lines_for_dirs(self, mount_paths: set[str]):
         """
-        Add a mount to the FSTAB
+        Remove the fstab entries for the given (sanitized) mount paths by dropping their lines,
+        rather than parsing and re-serialising every entry
+        """
+        def remove_lines(content: str) -> str:
+            lines = content.splitlines(keepends=True)
+            kept = [line for line in lines if self._line_dir(line) not in mount_paths]
+
+            # Leave the content untouched if nothing matched, so the file isn't rewritten
+            return content if len(kept) == len(lines) else "".join(kept)
+
+        self.fs_repository.rewrite_file(self.fstab_location, remove_lines)
+
+    def _create_entry(self, mount: Mount) -> Entry:
+        """
+        Create an FSTAB entry for a mount
         """
         sanitized_local_dir = self._sanitize_path(mount.mount_path)
         sanitized_actual_dir = self._sanitize_path(mount.actual_path)
         options = self._generate_mount_options(mount)
 
-        fstab = self._read_fstab()
-        fstab.entries.append(
-            Entry(sanitized_actual_dir, sanitized_local_dir, str(mount.mount_type.value), options, 0, 0)
-        )
-        self._write_fstab(fstab)
+        return Entry(sanitized_actual_dir, sanitized_local_dir, _MOUNT_TYPE_STR[mount.mount_type], options, 0, 0)
+
+    def store_mount_information(self, mount: Mount):
+        """
+        Add a mount to the FSTAB
+        """
+        self.store_mount_information_many([mount])
+
+    def store_mount_information_many(self, mounts: list[Mount]):
+        """
+        Add several mounts to the FSTAB, reading and writing the file once
+        """
+
+        # Create all the entries first, so nothing is written if any of the mounts are not supported
+        entries = [self._create_entry(mount) for mount in mounts]
+
+        content = self.fs_repository.read_file_cached(self.fstab_location)
+        fstab = self._parse_fstab(content)
+        seen = {(entry.device, entry.dir) for entry in fstab.entries}
+
+        # If the fstab already has duplicates, rewrite the whole file so they are removed
+        if len(seen) != len(fstab.entries):
+            fstab.entries.extend(entries)
+            self._write_fstab(fstab)
+            return
+
+        # Otherwise only append the entries that aren't already in the fstab
+        lines = []
+        for entry in entries:
+            key = (entry.device, entry.dir)
+            if key not in seen:
+                seen.add(key)
+                lines.append(str(entry))
+
+        if not lines:
+            return
+
+        # Make sure we start on a new line
+        if content and not content.endswith("\n"):
+            lines[0] = f"\n{lines[0]}"
+
+        self.fs_repository.append_lines(self.fstab_location, lines)
 
     def remove_mount_information(self, mount_path: str):
         """
         Remove a mount from the FSTAB
         """
 
-        # Sanitize the path
-        mount_path = self._sanitize_path(mount_path)
+        self._remove_lines_for_dirs({self._sanitize_path(mount_path)})
+
+    def replace_mounts(self, mounts: list[Mount]):
+        """
+        Replace the FSTAB entries for the given mount paths with these mounts, reading and writing the file once
+        """
+
+        # Create all the entries first, so nothing is written if any of the mounts are not supported
+        entries = [self._create_entry(mount) for mount in mounts]
+        mount_paths = {entry.dir for entry in entries}
+
+        def replace_lines(content: str) -> str:
+            kept = [line for line in content.splitlines(keepends=True) if self._line_dir(line) not in mount_paths]
 
-        # Read the fstab file
-        fstab = self._read_fstab()
+            # Make sure the new entries start on a new line
+            if kept and not kept[-1].endswith("\n"):
+                kept[-1] = f"{kept[-1]}\n"
 
-        # Remove the entry
-        fstab.entries = self._filter_entries(fstab.entries, lambda entry: entry.dir != mount_path)
+            return "".join(kept) + "".join(f"{entry}\n" for entry in entries)
 
-        self._write_fstab(fstab)
+        self.fs_repository.rewrite_file(self.fstab_location, replace_lines)
 
     def get_all_system_mounts(self) -> list[Mount]:
         """
         Get a list of the current mounts on the system from the FSTAB
         """
-        fstab = self._read_fstab()
-        return [MountFactory.create_from_fstab_entry(entry) for entry in fstab.entries]
+        fields = self._entry_fields(self.fs_repository.read_file_cached(self.fstab_location).splitlines())
+
+        # Duplicate entries give equal mounts, so dedupe on the mounts themselves
+        return list(dict.fromkeys(MountFactory.create_many_from_fstab_fields(fields)))
+
+    def get_system_mounts_with_prefix(self, prefix: str) -> list[Mount]:
+        """
+        Get a list of the mounts in the FSTAB whose mount path starts with prefix.
+        Lines are filtered before splitting, so only the matching entries are built
+        """
+        lines = [
+            line
+            for line in self.fs_repository.read_file_cached(self.fstab_location).splitlines()
+            if (self._line_dir(line) or "").startswith(prefix)
+        ]
+
+        # Duplicate entries give equal mounts, so dedupe on the mounts themselves
+        return list(dict.fromkeys(MountFactory.create_many_from_fstab_fields(self._entry_fields(lines))))
+
+    def _entry_fields(self, lines: list[str]) -> list[tuple[str, str, str]]:
+        """
+        Split fstab lines into the (device, dir, type) of each entry, skipping comments and malformed lines.
+        The mounts only need these three fields, so this avoids building an Entry for every line
+        """
+        fields = []
+        for line in lines:
+            parts = line.split()
+            if len(parts) == 6 and not parts[0].startswith("#"):
+                fields.append((parts[0], parts[1], parts[2]))
+        return fields
+
+    def _mounted_dirs(self) -> frozenset[str]:
+        """
+        Read the proc mounts file and return the set of directories that are mounted
+        """
+        return frozenset(mount_dir for _, mount_dir in self._read_proc_mounts())
 
     def is_mounted(self, mount_path: str) -> bool:
         """
-        Return True if the mount is currently mounted
+        Return True if the mount is currently mounted.
+        The proc mounts file is the source of truth, stat-ing the mount point misses bind mounts
+        and can hang on an unresponsive network mount
+        """
+        return mount_path in self._mounted_dirs()
+
+    def is_mounted_many(self, mount_paths: list[str]) -> dict[str, bool]:
+        """
+        Check several mounts at once, reading the proc mounts file a single time
+        :return: A dict of mount path -> True if the mount is currently mounted
         """
-        proc_mounts = self._read_proc_mounts()
-        return any(entry.dir == mount_path for entry in proc_mounts.entries)
+        mounted_dirs = self._mounted_dirs()
+        return {mount_path: mount_path in mounted_dirs for mount_path in mount_paths}
 
     def remove_mounts(self, mounts: list[Mount]):
         """
         Remove a list of mounts from the system
         """
-        mount_paths = {self._sanitize_path(mount.mount_path) for mount in mounts}
-        fstab = self._read_fstab()
-        fstab.entries = self._filter_entries(fstab.entries, lambda entry: entry.dir not in mount_paths)
-        self._write_fstab(fstab)
+        self._remove_lines_for_dirs({self._sanitize_path(mount.mount_path) for mount in mounts})
 
     def cleanup(self):
         """
         Remove duplicates and any mounts not present in the proc mounts file
         """
-        fstab = self._read_fstab()
-        proc_mounts = self._read_proc_mounts()
+        fstab = self._read_fstab_raw()
 
-        fstab.entries = self._filter_entries(
-            fstab.entries,
-            lambda entry: any(
-                proc_entry.dir == entry.dir and proc_entry.device == entry.device
-                for proc_entry in proc_mounts.entries
-            )
-        )
-        self._write_fstab(fstab)
+        # Store the device and dir of each mounted entry so we can check against them in one lookup
+        proc_keys = set(self._read_proc_mounts())
+
+        # Drop unmounted entries and duplicates in a single pass
+        seen: set[tuple[str, str]] = set()
+        keep = []
+        for entry in fstab.entries:
+            key = (entry.device, entry.dir)
+            if key in proc_keys and key not in seen:
+                seen.add(key)
+                keep.append(entry)
+
+        # Nothing was removed, so there is no need to rewrite the file
+        if len(keep) == len(fstab.entries):
+            return
+
+        fstab.entries = keep
+        self.fs_repository.write_file(self.fstab_location, str(fstab))
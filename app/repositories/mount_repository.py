@@ -1,8 +1,19 @@
-import json
+import ctypes
+import functools
+import os
 import subprocess
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+# orjson parses much faster than the standard library, but is optional
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
 
 from app.enums.enums import MountType
 from app.exceptions.cleanup_exception import CleanupException
+from app.exceptions.config_exception import ConfigException
 from app.exceptions.mount_exception import MountException
 from app.exceptions.unmount_exception import UnmountException
 from app.facades.log_facade import LogFacade
@@ -13,6 +24,38 @@ from app.interfaces.file_sytem_repository_interface import FileSystemRepositoryI
 from app.interfaces.mount_config_repository_interface import MountConfigRepositoryInterface
 from app.util.config import ConfigManager
 
+# The most mount point removals to run at once
+_MAX_REMOVE_WORKERS = 8
+
+# The most umount2 syscalls to have in flight at once
+_MAX_UNMOUNT_WORKERS = 16
+
+# How many batches of mount / umount calls to run at once if it isn't configured
+_DEFAULT_MOUNT_PARALLELISM = 4
+
+# The environment mount and umount are run with, rather than copying ours into every call.
+# A fixed locale also keeps their error messages the same wherever we run
+_COMMAND_ENV = {"PATH": "/usr/sbin:/usr/bin:/sbin:/bin", "LANG": "C", "LC_ALL": "C"}
+
+# The mount type value of Linux mounts in the desired mounts file, these get the ssh user added
+_LINUX_MOUNT_TYPE_VALUE = MountType.LINUX.value
+
+
+@functools.cache
+def _get_umount2():
+    """
+    Bind the umount2 syscall from libc, so unmounting doesn't need to fork and exec umount.
+    :return: The umount2 function, or None if libc can't be loaded
+    """
+    try:
+        umount2 = ctypes.CDLL("libc.so.6", use_errno=True).umount2
+    except (OSError, AttributeError):
+        return None
+
+    umount2.argtypes = [ctypes.c_char_p, ctypes.c_int]
+    umount2.restype = ctypes.c_int
+    return umount2
+
 
 class MountRepository(MountRepositoryInterface):
     """
@@ -23,95 +66,154 @@ class MountRepository(MountRepositoryInterface):
                  config_manager: ConfigManager,
                  mount_config_repository: MountConfigRepositoryInterface,
                  fs_repository: FileSystemRepositoryInterface,
-                 mount_prefix="/shares"):
+                 mount_prefix="/shares",
+                 use_syscalls: bool = None,
+                 use_sudo: bool = None):
         """
         :param config_manager: ConfigManager - An instance of the config manager to fetch configuration variables
         :param mount_config_repository: MountConfigRepository - An instance of the mount config repository to fetch
         mount information from FSTAB etc :param fs_repository: FileSystemRepositoryInterface - An instance of the
         file system repository to interact with the file system :param mount_prefix: str - The prefix for the mounts
-        we are interested in
+        we are interested in :param use_syscalls: bool - Unmount with the umount2 syscall rather than running
+        umount, defaults to True when running as root :param use_sudo: bool - Run mount and umount through sudo,
+        defaults to True unless running as root
         """
         self.config_manager = config_manager
         self.mount_config_repository = mount_config_repository
         self.fs_repository = fs_repository
         self.mount_prefix = mount_prefix
+        self.use_syscalls = os.geteuid() == 0 if use_syscalls is None else use_syscalls
+
+        # Running sudo as root only adds a PAM session and audit records to every call, so leave it out
+        use_sudo = os.geteuid() != 0 if use_sudo is None else use_sudo
+        self._command_prefix: tuple[str, ...] = ("sudo",) if use_sudo else ()
+
+        # Config doesn't change after startup, so read what we need once
+        self.desired_mounts_file_path = self.config_manager.get_config("DESIRED_MOUNTS_FILE_PATH")
+        self.linux_ssh_user = self.config_manager.get_config("LINUX_SSH_USER")
+        self.mount_parallelism = max(
+            1, int(self.config_manager.get_config("MOUNT_PARALLELISM") or _DEFAULT_MOUNT_PARALLELISM)
+        )
 
     def get_current_mounts(self) -> list[Mount]:
         """
         Get all the mounts on the system that we are interested in
         these are the ones that are prefixed with self.mount_prefix
         """
+        return self.get_current_and_orphan_mounts()[0]
 
-        # Fetch all the mounts on the system from the config repo
-        all_system_mounts = self.mount_config_repository.get_all_system_mounts()
+    def get_current_and_orphan_mounts(self) -> tuple[list[Mount], list[Mount]]:
+        """
+        Get the current mounts and the orphan mounts from a single read of the config and one mounted check,
+        as they are the two halves of the same mounts
+        """
 
-        current_mounts = []
+        # Fetch the mounts on the system from the config repo that start with our mount prefix
+        our_mounts = self._get_prefixed_system_mounts()
+
+        # Check which of them are mounted in one go
+        mounted = self.mount_config_repository.is_mounted_many([mount.mount_path for mount in our_mounts])
 
-        # Filter out the mounts that don't start with our mount prefix
-        for mount in all_system_mounts:
-            is_mount = self.mount_config_repository.is_mounted(mount.mount_path)
+        current_mounts = []
+        orphan_mounts = []
 
-            if mount.mount_path.startswith(self.mount_prefix) and is_mount:
+        for mount in our_mounts:
+            if mounted[mount.mount_path]:
                 current_mounts.append(mount)
-            elif not is_mount and mount.mount_path.startswith(self.mount_prefix):
-                LogFacade.warning(f"Mount {mount.mount_path} is present in the config but not mounted on the system")
+            else:
+                orphan_mounts.append(mount)
+                LogFacade.warning("Mount %s is present in the config but not mounted on the system", mount.mount_path)
 
-        return current_mounts
+        return current_mounts, orphan_mounts
 
     def get_desired_mounts(self) -> list[Mount]:
         """
         Read in the desired mounts from a .json file
         """
 
-        # Read the desired mounts from the file
-        mounts_data = json.loads(
-            self.fs_repository.read_file(self.config_manager.get_config("DESIRED_MOUNTS_FILE_PATH"))
-        )
-
-        mounts = []
+        # Read the desired mounts from the file, the parser decodes the bytes itself.
+        # Both parsers raise a ValueError subclass for invalid JSON
+        try:
+            mounts_data = _json_loads(self.fs_repository.read_file_bytes(self.desired_mounts_file_path))
+        except ValueError as e:
+            raise ConfigException(f"Invalid desired mounts file {self.desired_mounts_file_path}: {e}") from e
 
         for mount in mounts_data:
 
-            if mount["mount_type"] == MountType.LINUX.value:
+            if mount["mount_type"] == _LINUX_MOUNT_TYPE_VALUE:
                 # Add the linux user to the mount
-                mount["actual_path"] = f"{self.config_manager.get_config('LINUX_SSH_USER')}@{mount['actual_path']}"
-
-            # Append the mount to the list
-            mounts.append(MountFactory.create_from_json(mount))
+                mount["actual_path"] = f"{self.linux_ssh_user}@{mount['actual_path']}"
 
-        return mounts
+        # Build all the mounts in one go
+        return MountFactory.create_many_from_json(mounts_data)
 
     def get_orphan_mounts(self) -> list[Mount]:
 
-        # Fetch all the mounts on the system from the config repo
-        all_system_mounts = self.mount_config_repository.get_all_system_mounts()
-
-        return [
-            mount
-            for mount in all_system_mounts
-            if mount.mount_path.startswith(self.mount_prefix) and
-            not self.mount_config_repository.is_mounted(mount.mount_path)
-        ]
+        # The orphans are the mounts on the system that are not mounted
+        return self.get_current_and_orphan_mounts()[1]
 
     def mount(self, mount: Mount):
         """
         Add a mount to the system
         """
 
-        # First check if the mount is not a mount and if it's got files in
-        if (not self.mount_config_repository.is_mounted(mount.mount_path)
-                and not self.fs_repository.directory_empty(mount.mount_path)):
-            raise MountException(f"Mount point {mount.mount_path} is not empty, please remove the contents before "
-                                 f"mounting")
-
-        # Create the mount point
-        self._add_mount_point(mount.mount_path)
+        # Check and create the mount point
+        is_mounted = self._prepare_mount_point(mount.mount_path)
 
         # Store this mount information on the system to persist
         self.mount_config_repository.store_mount_information(mount)
 
         # Call the mount command
-        self._perform_mount(mount.mount_path)
+        self._perform_mount(mount.mount_path, is_mounted)
+
+    def mount_many(self, mounts: list[Mount]) -> list[Mount]:
+        """
+        Add several mounts to the system, storing all of their information in one go
+        :return: List of failed mounts
+        """
+
+        failed_to_mount = []
+        prepared_mounts = []
+
+        # Check which mount points are already mounted in one go, rather than once per mount
+        is_mounted = self.mount_config_repository.is_mounted_many([mount.mount_path for mount in mounts])
+
+        # Check and create the mount points
+        for mount in mounts:
+            try:
+                self._prepare_mount_point(mount.mount_path, is_mounted[mount.mount_path])
+                prepared_mounts.append(mount)
+            except MountException as e:
+                failed_to_mount.append(mount)
+                LogFacade.error("Failed to mount %s -> %s: %s", mount.mount_path, mount.actual_path, e)
+
+        # Store the mount information on the system to persist
+        try:
+            if prepared_mounts:
+                self.mount_config_repository.store_mount_information_many(prepared_mounts)
+        except MountException:
+            # At least one mount couldn't be stored, so store them one at a time to find out which
+            stored_mounts = []
+            for mount in prepared_mounts:
+                try:
+                    self.mount_config_repository.store_mount_information(mount)
+                    stored_mounts.append(mount)
+                except MountException as e:
+                    failed_to_mount.append(mount)
+                    LogFacade.error("Failed to mount %s -> %s: %s", mount.mount_path, mount.actual_path, e)
+            prepared_mounts = stored_mounts
+
+        # Mount them, one mount call per mount point with the calls overlapped unless we need sudo
+        mount_errors = self._perform_mount_many([mount.mount_path for mount in prepared_mounts], is_mounted)
+
+        for mount in prepared_mounts:
+            if mount.mount_path in mount_errors:
+                failed_to_mount.append(mount)
+                LogFacade.error(
+                    "Failed to mount %s -> %s: %s", mount.mount_path, mount.actual_path, mount_errors[mount.mount_path]
+                )
+
+        return failed_to_mount
 
     def unmount(self, mount_path: str):
         """
@@ -128,6 +230,64 @@ class MountRepository(MountRepositoryInterface):
         # Remove the mount point
         self._remove_mount_point(mount_path)
 
+    def update_many(self, mounts: list[Mount]) -> list[Mount]:
+        """
+        Replace the mounts at the same mount paths with these mounts, updating the mount information in one go
+        :return: List of failed mounts
+        """
+
+        failed_to_update = []
+        unmounted = []
+
+        # Unmount the existing mounts together, the mount points are kept as they will be mounted again
+        unmount_errors = self._perform_unmount_many([mount.mount_path for mount in mounts])
+
+        for mount in mounts:
+            if mount.mount_path in unmount_errors:
+                failed_to_update.append(mount)
+                LogFacade.error("Failed to unmount %s: %s", mount.mount_path, unmount_errors[mount.mount_path])
+            else:
+                unmounted.append(mount)
+
+        # Replace the mount information on the system
+        try:
+            if unmounted:
+                self.mount_config_repository.replace_mounts(unmounted)
+        except MountException:
+            # At least one mount couldn't be stored, so replace them one at a time to find out which
+            replaced = []
+            for mount in unmounted:
+                try:
+                    self.mount_config_repository.replace_mounts([mount])
+                    replaced.append(mount)
+                except MountException as e:
+                    failed_to_update.append(mount)
+                    LogFacade.error("Failed to mount %s -> %s: %s", mount.mount_path, mount.actual_path, e)
+            unmounted = replaced
+
+        # Check the mount points again now they are unmounted, all in one go
+        prepared_mounts = []
+        is_mounted = self.mount_config_repository.is_mounted_many([mount.mount_path for mount in unmounted])
+        for mount in unmounted:
+            try:
+                self._prepare_mount_point(mount.mount_path, is_mounted[mount.mount_path])
+                prepared_mounts.append(mount)
+            except MountException as e:
+                failed_to_update.append(mount)
+                LogFacade.error("Failed to mount %s -> %s: %s", mount.mount_path, mount.actual_path, e)
+
+        # Mount the new mounts, one mount call per mount point with the calls overlapped unless we need sudo
+        mount_errors = self._perform_mount_many([mount.mount_path for mount in prepared_mounts], is_mounted)
+
+        for mount in prepared_mounts:
+            if mount.mount_path in mount_errors:
+                failed_to_update.append(mount)
+                LogFacade.error(
+                    "Failed to mount %s -> %s: %s", mount.mount_path, mount.actual_path, mount_errors[mount.mount_path]
+                )
+
+        return failed_to_update
+
     def unmount_all(self) -> list[Mount]:
         """
         Unmount all mounts from the system that start with our mount prefix.
@@ -135,20 +295,36 @@ class MountRepository(MountRepositoryInterface):
         """
 
         # Fetch all the mounts on the system from the config repo
-        all_mounts = self.get_current_mounts()
+        return self.unmount_many(self.get_current_mounts())
 
-        # Remove all the mounts from the config
-        self.mount_config_repository.remove_mounts(all_mounts)
+    def unmount_many(self, mounts: list[Mount]) -> list[Mount]:
+        """
+        Remove several mounts from the system, removing all of their information in one go
+        :return: List of failed mounts
+        """
+        # Remove all the mounts from the config, there is nothing to rewrite if we have no mounts
+        if mounts:
+            self.mount_config_repository.remove_mounts(mounts)
 
         failed_to_unmount = []
 
-        for mount in all_mounts:
-            try:
-                self._perform_unmount(mount.mount_path)
-                self._remove_mount_point(mount.mount_path)
-            except UnmountException as e:
+        # Unmount them all together
+        unmount_errors = self._perform_unmount_many([mount.mount_path for mount in mounts])
+
+        for mount in mounts:
+            if mount.mount_path in unmount_errors:
                 failed_to_unmount.append(mount)
-                LogFacade.error(f"Failed to unmount {mount.mount_path}: {e}")
+                LogFacade.error("Failed to unmount %s: %s", mount.mount_path, unmount_errors[mount.mount_path])
+
+        # Remove the mount points of the unmounted mounts, overlapping the removals
+        unmounted = [mount for mount in mounts if mount.mount_path not in unmount_errors]
+        with ThreadPoolExecutor(max_workers=min(_MAX_REMOVE_WORKERS, len(unmounted) or 1)) as executor:
+            errors = executor.map(self._try_remove_mount_point, [mount.mount_path for mount in unmounted])
+
+            for mount, error in zip(unmounted, errors):
+                if error is not None:
+                    failed_to_unmount.append(mount)
+                    LogFacade.error("Failed to unmount %s: %s", mount.mount_path, error)
 
         return failed_to_unmount
 
@@ -162,6 +338,12 @@ class MountRepository(MountRepositoryInterface):
         except Exception as e:
             raise CleanupException(f"Error cleaning up mount configuration: {e}")
 
+    def _get_prefixed_system_mounts(self) -> list[Mount]:
+        """
+        Get the mounts from the config repo that start with our mount prefix
+        """
+        return self.mount_config_repository.get_system_mounts_with_prefix(self.mount_prefix)
+
     def _perform_unmount(self, mount_path: str):
         """
         Perform the actual unmount operation and handle errors.
@@ -169,24 +351,153 @@ class MountRepository(MountRepositoryInterface):
         :return: True if successful, False otherwise
         """
         if not self.mount_config_repository.is_mounted(mount_path):
-            LogFacade.warning(f"Attempted to unmount {mount_path} but it was already unmounted")
+            LogFacade.warning("Attempted to unmount %s but it was already unmounted", mount_path)
+
+        # Call the syscall directly if we can, it is much cheaper than running umount
+        umount2 = _get_umount2() if self.use_syscalls else None
+        if umount2 is not None:
+            if umount2(os.fsencode(mount_path), 0) != 0:
+                raise UnmountException(os.strerror(ctypes.get_errno()))
+            return
 
-        umount_result = subprocess.run(["sudo", "umount", mount_path], capture_output=True)
+        umount_result = subprocess.run(
+            [*self._command_prefix, "umount", mount_path], capture_output=True, env=_COMMAND_ENV
+        )
         if umount_result.returncode != 0:
             raise UnmountException(umount_result.stderr)
 
-    def _perform_mount(self, mount_path: str):
+    def _perform_unmount_many(self, mount_paths: list[str]) -> dict[str, str]:
+        """
+        Unmount several mounts together.
+        Uses the umount2 syscall from a thread pool if we can, otherwise umount is run with a batch of mount points
+        per call, the batches running at the same time unless we need sudo.
+        :param mount_paths: The local paths of the mounts to unmount
+        :return: A dict of mount path -> error for the mounts that are still mounted
+        """
+        if not mount_paths:
+            return {}
+
+        # Call the syscall directly for each mount if we can, it is much cheaper than running umount
+        umount2 = _get_umount2() if self.use_syscalls else None
+        if umount2 is not None:
+            # Network mounts can block while the server is contacted, so overlap the calls.
+            # ctypes releases the GIL during the call and keeps errno per thread
+            def unmount(mount_path: str) -> str | None:
+                if umount2(os.fsencode(mount_path), 0) != 0:
+                    return os.strerror(ctypes.get_errno())
+                return None
+
+            with ThreadPoolExecutor(max_workers=min(_MAX_UNMOUNT_WORKERS, len(mount_paths))) as executor:
+                results = executor.map(unmount, mount_paths)
+                errors = {mount_path: error for mount_path, error in zip(mount_paths, results) if error is not None}
+        else:
+            errors = self._run_in_batches(self._run_umount, mount_paths)
+
+        if not errors:
+            return {}
+
+        # Mounts that weren't mounted to begin with also fail, so only count those that are still mounted
+        mounted = self.mount_config_repository.is_mounted_many(list(errors))
+        return {mount_path: error for mount_path, error in errors.items() if mounted[mount_path]}
+
+    def _perform_mount(self, mount_path: str, is_mounted: bool = None):
         """
         Perform the actual mount operation and handle errors.
         :param mount_path: The local path of the mount to mount
+        :param is_mounted: Whether the mount is already mounted, if the caller has just checked. Checked if None
         """
-        if self.mount_config_repository.is_mounted(mount_path):
-            LogFacade.warning(f"Attempted to mount {mount_path} but it was already mounted")
+        if is_mounted is None:
+            is_mounted = self.mount_config_repository.is_mounted(mount_path)
+
+        if is_mounted:
+            LogFacade.warning("Attempted to mount %s but it was already mounted", mount_path)
 
-        mount_result = subprocess.run(["sudo", "mount", mount_path], capture_output=True)
+        mount_result = subprocess.run(
+            [*self._command_prefix, "mount", mount_path], capture_output=True, env=_COMMAND_ENV
+        )
         if mount_result.returncode != 0:
             raise MountException(mount_result.stderr)
 
+    def _perform_mount_many(self, mount_paths: list[str], is_mounted: dict[str, bool]) -> dict[str, str]:
+        """
+        Mount several mounts, running mount once for each of them.
+        The mounts are split into batches that run at the same time, unless we need sudo.
+        :param mount_paths: The local paths of the mounts to mount
+        :param is_mounted: Whether each mount is already mounted, as checked when its mount point was prepared
+        :return: A dict of mount path -> error for the mounts that failed
+        """
+        if not mount_paths:
+            return {}
+
+        for mount_path in mount_paths:
+            if is_mounted[mount_path]:
+                LogFacade.warning("Attempted to mount %s but it was already mounted", mount_path)
+
+        return self._run_in_batches(self._run_mounts, mount_paths)
+
+    def _run_in_batches(
+        self, run_batch: Callable[[list[str]], dict[str, str]], mount_paths: list[str]
+    ) -> dict[str, str]:
+        """
+        Split the mount paths into up to mount_parallelism batches and run them at the same time,
+        so slow network mounts overlap
+        :param run_batch: Runs a batch of mount paths, returning a dict of mount path -> error
+        :param mount_paths: The local paths of the mounts
+        :return: The errors from all the batches
+        """
+
+        # Parallel sudo calls could each ask for a password at the same time, so only run batches in parallel without it
+        batch_count = 1 if self._command_prefix else min(self.mount_parallelism, len(mount_paths))
+        if batch_count <= 1:
+            return run_batch(mount_paths)
+
+        errors = {}
+        with ThreadPoolExecutor(max_workers=batch_count) as executor:
+            for batch_errors in executor.map(run_batch, [mount_paths[i::batch_count] for i in range(batch_count)]):
+                errors.update(batch_errors)
+        return errors
+
+    def _run_umount(self, mount_paths: list[str]) -> dict[str, str]:
+        """
+        Unmount a batch of mounts with a single umount call
+        :return: A dict of mount path -> error, every mount counts as failed if umount fails
+        """
+        umount_result = subprocess.run(
+            [*self._command_prefix, "umount", *mount_paths], capture_output=True, env=_COMMAND_ENV
+        )
+
+        # umount carries on past failures, so we can't tell from the result which of them failed
+        if umount_result.returncode != 0:
+            return {mount_path: umount_result.stderr for mount_path in mount_paths}
+        return {}
+
+    def _run_mounts(self, mount_paths: list[str]) -> dict[str, str]:
+        """
+        Mount a batch of mounts one after another.
+        Each is its own mount call, mount only takes one mount point and sudo rules are scoped to mount itself
+        :return: A dict of mount path -> error for the mounts that failed
+        """
+        errors = {}
+        for mount_path in mount_paths:
+            mount_result = subprocess.run(
+                [*self._command_prefix, "mount", mount_path], capture_output=True, env=_COMMAND_ENV
+            )
+            if mount_result.returncode != 0:
+                errors[mount_path] = mount_result.stderr
+        return errors
+
+    def _try_remove_mount_point(self, mount_path: str) -> UnmountException | None:
+        """
+        Remove the mount point directory, returning the error rather than raising it
+        so it can be run for several mount points at once
+        :param mount_path: The path to remove
+        """
+        try:
+            self._remove_mount_point(mount_path)
+        except UnmountException as e:
+            return e
+        return None
+
     def _remove_mount_point(self, mount_path: str):
         """
         Remove the mount point directory.
@@ -197,15 +508,40 @@ class MountRepository(MountRepositoryInterface):
         except Exception as e:
             raise UnmountException(f"Error removing mount point {mount_path}: {e}")
 
+    def _prepare_mount_point(self, mount_path: str, is_mounted: bool = None) -> bool:
+        """
+        Check the mount point can be used and create it if needed.
+        :param mount_path: The path to prepare
+        :param is_mounted: Whether the mount point is mounted, if the caller has already checked. Checked if None
+        :return: True if the mount point is already mounted, so the caller doesn't need to check again
+        """
+        if is_mounted is None:
+            is_mounted = self.mount_config_repository.is_mounted(mount_path)
+
+        # A mounted mount point already exists, and its contents are the mount's
+        if is_mounted:
+            return True
+
+        # Check if the mount point exists and if it's got files in, both with one check
+        exists, empty = self.fs_repository.probe_directory(mount_path)
+        if not empty:
+            raise MountException(f"Mount point {mount_path} is not empty, please remove the contents before "
+                                 f"mounting")
+
+        # Create the mount point if it's missing
+        if not exists:
+            self._add_mount_point(mount_path)
+
+        return False
+
     def _add_mount_point(self, mount_path):
         """
         Add a mount point directory.
         :param mount_path: The path to add
         """
         try:
-            # Create the mount point if it doesn't exist
-            if not self.fs_repository.directory_exists(mount_path):
-                self.fs_repository.create_directory(mount_path)
+            # Create the mount point, creating a directory that already exists is a no-op
+            self.fs_repository.create_directory(mount_path)
         except Exception as e:
             raise MountException(f"Error adding mount point {mount_path}: {e}")
 
@@ -216,7 +552,8 @@ class MountRepository(MountRepositoryInterface):
         """
 
         # Check the mount point exists and if it is empty
-        if self.fs_repository.directory_exists(mount_path) and not self.fs_repository.directory_empty(mount_path):
+        exists, empty = self.fs_repository.probe_directory(mount_path)
+        if exists and not empty:
             raise UnmountException(
                 f"Mount point {mount_path} is not empty, please remove the contents before unmounting"
             )
@@ -1,15 +1,28 @@
+import logging
 from collections.abc import Callable
+from dataclasses import dataclass
 
 from app.exceptions.cleanup_exception import CleanupException
-from app.exceptions.mount_exception import MountException
-from app.exceptions.unmount_exception import UnmountException
 from app.facades.log_facade import LogFacade
 from app.models.mount import Mount
 from app.interfaces.mount_repository_interface import MountRepositoryInterface
 
 
+@dataclass(frozen=True, slots=True)
+class _MountChanges:
+    """
+    The changes needed to get from the current mounts to the desired mounts
+    """
+    to_add: list[Mount]
+    to_remove: list[Mount]
+    to_update: list[Mount]
+
+
 class MountingService:
 
+    # Column headings used for every table of mounts we log
+    _MOUNT_TABLE_HEADERS = ["Mount Path", "Actual Path"]
+
     def __init__(self, mount_repository: MountRepositoryInterface):
         self.mount_repository = mount_repository
 
@@ -17,13 +30,13 @@ class MountingService:
         """
         Run the mounting service by adding, removing, and updating mounts as needed.
         """
-        desired_mounts, current_mounts = self._fetch_mount_data()
+        changes = self._find_changes(*self._fetch_mount_data())
 
         # Process mounts
         all_operations_successful = (
-            self._process_mounts("add", desired_mounts, current_mounts, self._add_mounts) and
-            self._process_mounts("remove", desired_mounts, current_mounts, self._remove_mounts) and
-            self._process_mounts("update", desired_mounts, current_mounts, self._update_mounts)
+            self._process_mounts("add", changes.to_add, self._add_mounts) and
+            self._process_mounts("remove", changes.to_remove, self._remove_mounts) and
+            self._process_mounts("update", changes.to_update, self._update_mounts)
         )
 
         return all_operations_successful
@@ -32,15 +45,18 @@ class MountingService:
         """
         Display the mounts that would be added, removed, or updated without making any changes.
         """
-        desired_mounts, current_mounts = self._fetch_mount_data()
-        orphan_mounts = self.mount_repository.get_orphan_mounts()
+        desired_mounts = self.mount_repository.get_desired_mounts()
+
+        # The current and orphan mounts come from the same mounts, so fetch them together
+        current_mounts, orphan_mounts = self.mount_repository.get_current_and_orphan_mounts()
+        changes = self._find_changes(desired_mounts, current_mounts)
 
         # Log planned operations
-        self._log_mounts("add", desired_mounts, current_mounts)
-        self._log_mounts("remove", desired_mounts, current_mounts)
-        self._log_mounts("update", desired_mounts, current_mounts)
-        self._log_mounts("orphans", desired_mounts, current_mounts, orphan_mounts, custom_message="Orphan mounts")
-        self._log_mounts("current", desired_mounts, current_mounts, custom_message="Current mounts")
+        self._log_mount_table(logging.INFO, "Mounts to add", changes.to_add)
+        self._log_mount_table(logging.INFO, "Mounts to remove", changes.to_remove)
+        self._log_mount_table(logging.INFO, "Mounts to update", changes.to_update)
+        self._log_mount_table(logging.INFO, "Orphan mounts", orphan_mounts)
+        self._log_mount_table(logging.INFO, "Current mounts", current_mounts)
 
         return True
 
@@ -53,7 +69,7 @@ class MountingService:
         try:
             self.mount_repository.cleanup()
         except CleanupException as e:
-            LogFacade.error(f"Failed to cleanup mounts: {e}")
+            LogFacade.error("Failed to cleanup mounts: %s", e)
             return False
         return True
 
@@ -67,10 +83,7 @@ class MountingService:
 
         # If at least one mount failed, log the results
         if failed_to_umount:
-            LogFacade.log_table_error(
-                "Failed to unmount these mounts",
-                ["Mount Path", "Actual Path"],
-                [[mount.mount_path, mount.actual_path] for mount in failed_to_umount])
+            self._log_mount_table(logging.ERROR, "Failed to unmount these mounts", failed_to_umount)
 
         # Return status (at least once failed mount is a failure)
         return len(failed_to_umount) == 0
@@ -83,109 +96,63 @@ class MountingService:
         current_mounts = self.mount_repository.get_current_mounts()
         return desired_mounts, current_mounts
 
-    def _process_mounts(self, action: str,
-                        desired_mounts: list[Mount],
-                        current_mounts: list[Mount],
-                        operation: Callable) -> bool:
+    def _find_changes(self, desired_mounts: list[Mount], current_mounts: list[Mount]) -> _MountChanges:
+        """
+        Work out the mounts to add, remove and update, once per run
+        """
+        return _MountChanges(
+            to_add=self._find_mounts_to_add(desired_mounts, current_mounts),
+            to_remove=self._find_mounts_to_remove(desired_mounts, current_mounts),
+            to_update=self._find_mounts_to_update(desired_mounts, current_mounts),
+        )
+
+    def _process_mounts(self, action: str, mounts: list[Mount], operation: Callable) -> bool:
         """
-        Process mounts for a specific action (add, remove, update) using the provided operation.
+        Process the mounts for an action (add, remove, update) using the provided operation.
         """
-        if action == "add":
-            mounts = self._find_mounts_to_add(desired_mounts, current_mounts)
-        elif action == "remove":
-            mounts = self._find_mounts_to_remove(desired_mounts, current_mounts)
-        elif action == "update":
-            mounts = self._find_mounts_to_update(desired_mounts, current_mounts)
-        else:
-            raise ValueError(f"Unknown action: {action}")
 
         # Log the mounts that will be processed
-        self._log_mounts(action, desired_mounts, current_mounts)
+        self._log_mount_table(logging.INFO, f"Mounts to {action}", mounts)
 
         # Perform the operation and return the result
         return operation(mounts)
 
-    def _log_mounts(self, action: str,
-                    desired_mounts: list[Mount],
-                    current_mounts: list[Mount],
-                    orphan_mounts=None,
-                    custom_message=None):
+    def _log_mount_table(self, level: int, title: str, mounts: list[Mount]):
         """
-        Log mount actions (add, remove, update) to provide an overview of planned operations.
+        Log a table of mounts, the rows are only built if the level is enabled
         """
-        if action == "add":
-            mounts = self._find_mounts_to_add(desired_mounts, current_mounts)
-        elif action == "remove":
-            mounts = self._find_mounts_to_remove(desired_mounts, current_mounts)
-        elif action == "update":
-            mounts = self._find_mounts_to_update(desired_mounts, current_mounts)
-        elif action == "orphans":
-            mounts = orphan_mounts
-        elif action == "current":
-            mounts = current_mounts
-        else:
-            raise ValueError(f"Unknown action: {action}")
-
-        title = f"Mounts to {action}" if custom_message is None else custom_message
-
-        LogFacade.log_table_info(
+        if not LogFacade.is_enabled_for(level):
+            return
+
+        LogFacade.log_table(
+            level,
             title,
-            ["Mount Path", "Actual Path"],
+            self._MOUNT_TABLE_HEADERS,
             [[mount.mount_path, mount.actual_path] for mount in mounts]
         )
 
-    def _mount(self, mount: Mount) -> bool:
-        """
-        Mount a directory
-        :return True if the mount was mounted successfully
-        """
-        LogFacade.info(f"Mounting {mount.mount_path} -> {mount.actual_path} ...")
-        try:
-            self.mount_repository.mount(mount)
-        except MountException as e:
-            LogFacade.error(f"Failed to mount {mount.mount_path} -> {mount.actual_path}: {e}")
-            return False
-        return True
-
-    def _unmount(self, mount: Mount) -> bool:
-        """
-        Unmount a directory
-        :return True if the mount was unmounted successfully
-        """
-        LogFacade.info(f"Unmounting {mount.mount_path} ...")
-        try:
-            self.mount_repository.unmount(mount.mount_path)
-        except UnmountException as e:
-            LogFacade.error(f"Failed to unmount {mount.mount_path}: {e}")
-            return False
-        return True
-
     def _remove_mounts(self, mounts: list[Mount]) -> bool:
         """
         Remove a list of mounts from the system
         :return: True if all mounts were removed successfully
         """
-        failed_mounts = []
-        success_mounts = []
         for mount in mounts:
-            if not self._unmount(mount):
-                failed_mounts.append(mount)
-            else:
-                success_mounts.append(mount)
+            LogFacade.info("Unmounting %s ...", mount.mount_path)
+
+        # Remove the mounts in one go so the mount information is only rewritten once
+        failed_mounts = self.mount_repository.unmount_many(mounts) if mounts else []
+
+        # Mounts are hashable, so each membership check is a set lookup rather than a scan of the failures
+        failed = set(failed_mounts)
+        success_mounts = [mount for mount in mounts if mount not in failed]
 
         # Log the unsuccessful mounts
         if failed_mounts:
-            LogFacade.log_table_error(
-                "Failed to remove these mounts",
-                ["Mount Path", "Actual Path"],
-                [[mount.mount_path, mount.actual_path] for mount in failed_mounts])
+            self._log_mount_table(logging.ERROR, "Failed to remove these mounts", failed_mounts)
 
         # Log the successful mounts
         if success_mounts:
-            LogFacade.log_table_info(
-                "Successfully removed these mounts",
-                ["Mount Path", "Actual Path"],
-                [[mount.mount_path, mount.actual_path] for mount in success_mounts])
+            self._log_mount_table(logging.INFO, "Successfully removed these mounts", success_mounts)
 
         return len(failed_mounts) == 0
 
@@ -194,27 +161,23 @@ class MountingService:
         Add a list of mounts to the system
         :return: True if all mounts were added successfully
         """
-        failed_mounts = []
-        success_mounts = []
         for mount in mounts:
-            if not self._mount(mount):
-                failed_mounts.append(mount)
-            else:
-                success_mounts.append(mount)
+            LogFacade.info("Mounting %s -> %s ...", mount.mount_path, mount.actual_path)
+
+        # Add the mounts in one go so the mount information is only written once
+        failed_mounts = self.mount_repository.mount_many(mounts) if mounts else []
+
+        # Split out the successful mounts
+        failed = set(failed_mounts)
+        success_mounts = [mount for mount in mounts if mount not in failed]
 
         # Log the unsuccessful mounts
         if failed_mounts:
-            LogFacade.log_table_error(
-                "Failed to add these mounts",
-                ["Mount Path", "Actual Path"],
-                [[mount.mount_path, mount.actual_path] for mount in failed_mounts])
+            self._log_mount_table(logging.ERROR, "Failed to add these mounts", failed_mounts)
 
         # Log the successful mounts
         if success_mounts:
-            LogFacade.log_table_info(
-                "Successfully added these mounts",
-                ["Mount Path", "Actual Path"],
-                [[mount.mount_path, mount.actual_path] for mount in success_mounts])
+            self._log_mount_table(logging.INFO, "Successfully added these mounts", success_mounts)
         return len(failed_mounts) == 0
 
     def _update_mounts(self, mounts: list[Mount]) -> bool:
@@ -222,27 +185,23 @@ class MountingService:
         Update a list of mounts
         :return: True if all mounts were updated successfully
         """
-        failed_mounts = []
-        success_mounts = []
         for mount in mounts:
-            if not self._unmount(mount) or not self._mount(mount):
-                failed_mounts.append(mount)
-            else:
-                success_mounts.append(mount)
+            LogFacade.info("Updating %s -> %s ...", mount.mount_path, mount.actual_path)
+
+        # Update the mounts in one go so the mount information is only rewritten once
+        failed_mounts = self.mount_repository.update_many(mounts) if mounts else []
+
+        # Split out the successful mounts
+        failed = set(failed_mounts)
+        success_mounts = [mount for mount in mounts if mount not in failed]
 
         # Log the unsuccessful mounts
         if failed_mounts:
-            LogFacade.log_table_error(
-                "Failed to update these mounts",
-                ["Mount Path", "Actual Path"],
-                [[mount.mount_path, mount.actual_path] for mount in failed_mounts])
+            self._log_mount_table(logging.ERROR, "Failed to update these mounts", failed_mounts)
 
         # Log the successful mounts
         if success_mounts:
-            LogFacade.log_table_info(
-                "Successfully updated these mounts",
-                ["Mount Path", "Actual Path"],
-                [[mount.mount_path, mount.actual_path] for mount in success_mounts])
+            self._log_mount_table(logging.INFO, "Successfully updated these mounts", success_mounts)
         return len(failed_mounts) == 0
 
     def _find_mounts_to_remove(self, desired_mounts: list[Mount], current_mounts: list[Mount]) -> list[Mount]:
@@ -252,8 +211,8 @@ class MountingService:
         but is in the current mounts
         """
 
-        # Make a list of the local mount paths for the desired mounts
-        desired_mount_paths = [mount.mount_path for mount in desired_mounts]
+        # Make a set of the local mount paths for the desired mounts
+        desired_mount_paths = {mount.mount_path for mount in desired_mounts}
 
         # Any mounts that are in the current mounts but not in the desired mounts can be removed
         return [mount for mount in current_mounts if mount.mount_path not in desired_mount_paths]
@@ -265,8 +224,8 @@ class MountingService:
         not in the current mounts
         """
 
-        # Make a list of the local mount paths for the current mounts
-        current_mount_paths = [mount.mount_path for mount in current_mounts]
+        # Make a set of the local mount paths for the current mounts
+        current_mount_paths = {mount.mount_path for mount in current_mounts}
 
         # Any mounts that are in the desired mounts but not in the current mounts can be added
         return [mount for mount in desired_mounts if mount.mount_path not in current_mount_paths]
@@ -278,12 +237,12 @@ class MountingService:
         the same but the actual path or mount type is different
         """
 
-        mounts_to_update = []
+        # Look up the current mounts by their local mount path
+        current_by_path = {mount.mount_path: mount for mount in current_mounts}
 
-        for desired_mount in desired_mounts:
-            for current_mount in current_mounts:
-                # If the mount paths are the same but the mounts are different then we need to update
-                if (desired_mount.mount_path == current_mount.mount_path
-                        and desired_mount != current_mount):
-                    mounts_to_update.append(desired_mount)
-        return mounts_to_update
+        # If the mount paths are the same but the mounts are different then we need to update
+        return [
+            mount
+            for mount in desired_mounts
+            if mount.mount_path in current_by_path and mount != current_by_path[mount.mount_path]
+        ]
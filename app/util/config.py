@@ -29,6 +29,7 @@ class ConfigManager:
         self.add_config('CIFS_FILE_LOCATION', getenv('CIFS_FILE_LOCATION'))
         self.add_config('CIFS_DOMAIN', getenv('CIFS_DOMAIN', 'ONS'))
         self.add_config('DESIRED_MOUNTS_FILE_PATH', getenv('DESIRED_MOUNTS_FILE_PATH', 'mounts.json'))
+        self.add_config('MOUNT_PARALLELISM', getenv('MOUNT_PARALLELISM', '4'))
         self.add_config('FSTAB_LOCATION', '/etc/fstab')
         self.add_config('PROC_MOUNTS_LOCATION', '/proc/mounts')
         self.add_config('PROJECT_FOLDER', self.project_folder)
@@ -49,3 +50,9 @@ class ConfigManager:
         missing_keys = [key for key in required_keys if not self.get_config(key)]
         if missing_keys:
             raise ConfigException(f"Missing required configuration variables: {missing_keys}")
+
+        # The number of mount calls to run at once must be a positive whole number
+        mount_parallelism = str(self.get_config('MOUNT_PARALLELISM'))
+        if not mount_parallelism.isdigit() or int(mount_parallelism) < 1:
+            raise ConfigException(f"MOUNT_PARALLELISM must be a positive whole number, got {mount_parallelism}")
+        self.add_config('MOUNT_PARALLELISM', int(mount_parallelism))
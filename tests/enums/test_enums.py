@@ -0,0 +1,31 @@
+import unittest
+
+from app.enums.enums import MountType
+
+
+class TestFromStr(unittest.TestCase):
+
+    def test_from_str_known_values(self):
+        """
+        Each mount type value should resolve to its member
+        """
+        self.assertEqual(MountType.WINDOWS, MountType.from_str("cifs"))
+        self.assertEqual(MountType.LINUX, MountType.from_str("fuse.sshfs"))
+        self.assertEqual(MountType.HOST, MountType.from_str("host"))
+
+    def test_from_str_is_case_insensitive(self):
+        """
+        The lookup should ignore the case of the input
+        """
+        self.assertEqual(MountType.WINDOWS, MountType.from_str("CIFS"))
+        self.assertEqual(MountType.LINUX, MountType.from_str("Fuse.SSHFS"))
+
+    def test_from_str_unknown_value(self):
+        """
+        Unknown values should fall back to MountType.NONE
+        """
+        self.assertEqual(MountType.NONE, MountType.from_str("ext4"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+
+from app.facades.log_facade import LogFacade
+
+
+class TestFormatTable(unittest.TestCase):
+
+    def test_format_table(self):
+        """
+        The table should be drawn as a grid with padded columns under the title
+        """
+        formatted = LogFacade.format_table(
+            "Mounts",
+            ["Mount Path", "Actual Path"],
+            [["/shares/a", "//server/a"], ["/shares/longer", None]]
+        )
+
+        expected = "\n".join([
+            "",
+            "",
+            "Mounts",
+            "======",
+            "+----------------+-------------+",
+            "| Mount Path     | Actual Path |",
+            "+================+=============+",
+            "| /shares/a      | //server/a  |",
+            "+----------------+-------------+",
+            "| /shares/longer |             |",
+            "+----------------+-------------+",
+            "",
+        ])
+
+        self.assertEqual(expected, formatted)
+
+    def test_format_table_no_rows(self):
+        """
+        An empty table should still show the headers
+        """
+        formatted = LogFacade.format_table("Empty", ["Key"], [])
+
+        self.assertIn("| Key |", formatted)
+
+    def test_format_table_ragged_rows(self):
+        """
+        Short rows should be padded with empty cells, and a long row should add a column rather than fail
+        """
+        formatted = LogFacade.format_table("Ragged", ["A", "B"], [["1"], ["2", "3", "4"]])
+
+        expected = "\n".join([
+            "",
+            "",
+            "Ragged",
+            "======",
+            "+---+---+---+",
+            "| A | B |   |",
+            "+===+===+===+",
+            "| 1 |   |   |",
+            "+---+---+---+",
+            "| 2 | 3 | 4 |",
+            "+---+---+---+",
+            "",
+        ])
+
+        self.assertEqual(expected, formatted)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,4 @@
+import dataclasses
 import unittest
 
 from app.enums.enums import MountType
@@ -20,6 +21,53 @@ class TestEquals(unittest.TestCase):
 
         self.assertEqual(m1, m2)
 
+    def test_not_equal_to_other_types(self):
+        mount = Mount(
+            mount_path="/mnt",
+            actual_path="/mnt",
+            mount_type=MountType.NONE
+        )
+
+        self.assertNotEqual(mount, "/mnt")
+
+
+class TestHash(unittest.TestCase):
+    def test_equal_mounts_hash_the_same(self):
+        m1 = Mount(
+            mount_path="/mnt",
+            actual_path="/mnt",
+            mount_type=MountType.NONE
+        )
+
+        m2 = Mount(
+            mount_path="/mnt",
+            actual_path="/mnt",
+            mount_type=MountType.NONE
+        )
+
+        self.assertEqual(1, len({m1, m2}))
+
+
+class TestImmutable(unittest.TestCase):
+    def test_cannot_modify_mount(self):
+        mount = Mount(
+            mount_path="/mnt",
+            actual_path="/mnt",
+            mount_type=MountType.NONE
+        )
+
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            mount.mount_path = "/elsewhere"
+
+    def test_mount_has_no_instance_dict(self):
+        mount = Mount(
+            mount_path="/mnt",
+            actual_path="/mnt",
+            mount_type=MountType.NONE
+        )
+
+        self.assertFalse(hasattr(mount, "__dict__"))
+
 
 if __name__ == '__main__':
     unittest.main()
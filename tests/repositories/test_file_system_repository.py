@@ -0,0 +1,349 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from app.repositories.file_sytem_repository import FileSystemRepository
+
+
+class TestReadFileCached(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.temp_dir.name, "fstab")
+        self.fs_repository = FileSystemRepository()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_read_file_cached_returns_content(self):
+        """
+        A cached read should return the contents of the file
+        """
+        with open(self.file_path, "w") as f:
+            f.write("first")
+
+        self.assertEqual("first", self.fs_repository.read_file_cached(self.file_path))
+
+    def test_read_large_file(self):
+        """
+        Large files are memory mapped when read, the content should be the same
+        """
+        content = "UUID=1234 /shares/example cifs defaults 0 0\n" * 4096
+        with open(self.file_path, "w") as f:
+            f.write(content)
+
+        self.assertEqual(content, self.fs_repository.read_file(self.file_path))
+
+    def test_read_file_bytes(self):
+        """
+        Reading the raw bytes should give the undecoded content of the file
+        """
+        with open(self.file_path, "wb") as f:
+            f.write("caf\u00e9".encode("utf-8"))
+
+        self.assertEqual("caf\u00e9".encode("utf-8"), self.fs_repository.read_file_bytes(self.file_path))
+
+    def test_read_file_cached_sees_external_changes(self):
+        """
+        If the file is changed outside the repository, the cached read should pick up the new contents
+        """
+        with open(self.file_path, "w") as f:
+            f.write("first")
+        self.fs_repository.read_file_cached(self.file_path)
+
+        with open(self.file_path, "w") as f:
+            f.write("second, longer")
+
+        self.assertEqual("second, longer", self.fs_repository.read_file_cached(self.file_path))
+
+    def test_read_file_cached_after_write(self):
+        """
+        Writing through the repository should update the cached contents
+        """
+        self.fs_repository.write_file(self.file_path, "written")
+
+        self.assertEqual("written", self.fs_repository.read_file_cached(self.file_path))
+
+
+class TestWriteFile(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.temp_dir.name, "fstab")
+        self.fs_repository = FileSystemRepository()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_write_file_replaces_content_and_keeps_permissions(self):
+        """
+        Writing should replace the contents of the file without changing its permissions
+        """
+        with open(self.file_path, "w") as f:
+            f.write("old content")
+        os.chmod(self.file_path, 0o640)
+
+        self.fs_repository.write_file(self.file_path, "new")
+
+        with open(self.file_path) as f:
+            self.assertEqual("new", f.read())
+        self.assertEqual(0o640, os.stat(self.file_path).st_mode & 0o777)
+
+    def test_write_file_new_file_is_synced_with_default_permissions(self):
+        """
+        A new file should be synced to disk before it is swapped in, and be readable by everyone
+        """
+        with patch("os.fsync", wraps=os.fsync) as fsync:
+            self.fs_repository.write_file(self.file_path, "new")
+
+        fsync.assert_called_once()
+        self.assertEqual(0o644, os.stat(self.file_path).st_mode & 0o777)
+        self.assertEqual("new", self.fs_repository.read_file_cached(self.file_path))
+
+    def test_write_file_skips_unchanged_content(self):
+        """
+        Writing the content the file already holds shouldn't replace the file
+        """
+        self.fs_repository.write_file(self.file_path, "content")
+        inode = os.stat(self.file_path).st_ino
+
+        self.fs_repository.write_file(self.file_path, "content")
+
+        self.assertEqual(inode, os.stat(self.file_path).st_ino)
+
+    def test_write_file_failure_leaves_original(self):
+        """
+        If the write fails, the original file should be untouched and no temporary files left behind
+        """
+        with open(self.file_path, "w") as f:
+            f.write("original")
+
+        with self.assertRaises(TypeError):
+            self.fs_repository.write_file(self.file_path, None)
+
+        with open(self.file_path) as f:
+            self.assertEqual("original", f.read())
+        self.assertEqual(["fstab"], os.listdir(self.temp_dir.name))
+
+    def test_write_file_through_symlink_keeps_link(self):
+        """
+        Writing to a symlink should replace the file it points to and leave the link in place
+        """
+        target_path = os.path.join(self.temp_dir.name, "fstab.real")
+        with open(target_path, "w") as f:
+            f.write("old content")
+        os.symlink(target_path, self.file_path)
+
+        self.fs_repository.write_file(self.file_path, "new")
+
+        self.assertTrue(os.path.islink(self.file_path))
+        with open(target_path) as f:
+            self.assertEqual("new", f.read())
+
+    @unittest.skipUnless(os.geteuid() == 0, "Only root can create files owned by another user")
+    def test_write_file_keeps_ownership_as_root(self):
+        """
+        As root, the replacement file should be given the owner and group of the file it replaces
+        """
+        with open(self.file_path, "w") as f:
+            f.write("old content")
+        os.chown(self.file_path, 4242, 4242)
+        inode = os.stat(self.file_path).st_ino
+
+        self.fs_repository.write_file(self.file_path, "new")
+
+        file_stat = os.stat(self.file_path)
+        self.assertEqual((4242, 4242), (file_stat.st_uid, file_stat.st_gid))
+        self.assertNotEqual(inode, file_stat.st_ino)
+
+    def test_write_file_owned_by_another_user_writes_in_place(self):
+        """
+        Without root, a file owned by someone else can't be replaced without taking it over,
+        so it should be written in place instead
+        """
+        with open(self.file_path, "w") as f:
+            f.write("old content")
+        inode = os.stat(self.file_path).st_ino
+        other_uid = os.stat(self.file_path).st_uid + 1
+
+        with patch("os.geteuid", return_value=other_uid), patch("os.fchown") as fchown:
+            self.fs_repository.write_file(self.file_path, "new")
+
+        fchown.assert_not_called()
+        self.assertEqual(inode, os.stat(self.file_path).st_ino)
+        self.assertEqual("new", self.fs_repository.read_file_cached(self.file_path))
+
+    def test_write_file_without_directory_access_writes_in_place(self):
+        """
+        If a temporary file can't be created next to the file, it should be written in place instead
+        """
+        with open(self.file_path, "w") as f:
+            f.write("old content")
+        inode = os.stat(self.file_path).st_ino
+
+        with patch("tempfile.mkstemp", side_effect=PermissionError):
+            self.fs_repository.write_file(self.file_path, "new")
+
+        self.assertEqual(inode, os.stat(self.file_path).st_ino)
+        with open(self.file_path) as f:
+            self.assertEqual("new", f.read())
+
+    def test_write_file_is_utf8(self):
+        """
+        Content should be written as UTF-8 whatever the locale, so it reads back the same
+        """
+        self.fs_repository.write_file(self.file_path, "/mnt/café")
+
+        with open(self.file_path, "rb") as f:
+            self.assertEqual("/mnt/café".encode("utf-8"), f.read())
+
+
+class TestRewriteFile(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.temp_dir.name, "fstab")
+        self.fs_repository = FileSystemRepository()
+        self.fs_repository.write_file(self.file_path, "content")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_rewrite_file_writes_changes(self):
+        """
+        The transformed contents should be written to the file
+        """
+        self.assertTrue(self.fs_repository.rewrite_file(self.file_path, str.upper))
+
+        with open(self.file_path) as f:
+            self.assertEqual("CONTENT", f.read())
+
+    def test_rewrite_file_skips_unchanged(self):
+        """
+        If the transform doesn't change anything, the file shouldn't be written
+        """
+        mtime = os.stat(self.file_path).st_mtime_ns
+
+        self.assertFalse(self.fs_repository.rewrite_file(self.file_path, lambda content: content))
+        self.assertEqual(mtime, os.stat(self.file_path).st_mtime_ns)
+
+
+class TestAppendLines(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.temp_dir.name, "fstab")
+        self.fs_repository = FileSystemRepository()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_append_lines(self):
+        """
+        Appending should add each line to the end of the file, and later cached reads should see them
+        """
+        self.fs_repository.write_file(self.file_path, "first\n")
+
+        self.fs_repository.append_lines(self.file_path, ["second", "third"])
+
+        self.assertEqual("first\nsecond\nthird\n", self.fs_repository.read_file_cached(self.file_path))
+
+
+class TestExistenceChecks(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.temp_dir.name, "file")
+        self.directory_path = os.path.join(self.temp_dir.name, "directory")
+        self.missing_path = os.path.join(self.temp_dir.name, "missing")
+        self.fs_repository = FileSystemRepository()
+
+        with open(self.file_path, "w") as f:
+            f.write("content")
+        os.mkdir(self.directory_path)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_file_exists(self):
+        """
+        Any existing path should count as an existing file
+        """
+        self.assertTrue(self.fs_repository.file_exists(self.file_path))
+        self.assertTrue(self.fs_repository.file_exists(self.directory_path))
+        self.assertFalse(self.fs_repository.file_exists(self.missing_path))
+
+    def test_directory_exists(self):
+        """
+        Any existing path should count as an existing directory
+        """
+        self.assertTrue(self.fs_repository.directory_exists(self.directory_path))
+        self.assertTrue(self.fs_repository.directory_exists(self.file_path))
+        self.assertFalse(self.fs_repository.directory_exists(self.missing_path))
+
+    def test_exists_follows_symlinks_and_special_files(self):
+        """
+        Symlinks are followed, so a link to a directory exists and a dangling link doesn't.
+        Special files such as FIFOs exist too
+        """
+        directory_link = os.path.join(self.temp_dir.name, "directory_link")
+        dangling_link = os.path.join(self.temp_dir.name, "dangling_link")
+        fifo_path = os.path.join(self.temp_dir.name, "fifo")
+        os.symlink(self.directory_path, directory_link)
+        os.symlink(self.missing_path, dangling_link)
+        os.mkfifo(fifo_path)
+
+        self.assertTrue(self.fs_repository.directory_exists(directory_link))
+        self.assertTrue(self.fs_repository.file_exists(directory_link))
+        self.assertFalse(self.fs_repository.file_exists(dangling_link))
+        self.assertTrue(self.fs_repository.file_exists(fifo_path))
+        self.assertTrue(self.fs_repository.file_exists("/dev/null"))
+
+    def test_directory_empty(self):
+        """
+        Missing and empty directories are empty, directories with content are not
+        """
+        self.assertTrue(self.fs_repository.directory_empty(self.directory_path))
+        self.assertTrue(self.fs_repository.directory_empty(self.missing_path))
+        self.assertFalse(self.fs_repository.directory_empty(self.temp_dir.name))
+
+    def test_probe_directory(self):
+        """
+        Probing should give the same answers as the separate exists and empty checks
+        """
+        self.assertEqual((True, True), self.fs_repository.probe_directory(self.directory_path))
+        self.assertEqual((False, True), self.fs_repository.probe_directory(self.missing_path))
+        self.assertEqual((True, False), self.fs_repository.probe_directory(self.temp_dir.name))
+
+    def test_remove_directory(self):
+        """
+        Both empty directories and directories with content should be removed
+        """
+        os.mkdir(os.path.join(self.directory_path, "child"))
+        empty_path = os.path.join(self.temp_dir.name, "empty")
+        os.mkdir(empty_path)
+
+        self.fs_repository.remove_directory(empty_path)
+        self.fs_repository.remove_directory(self.directory_path)
+
+        self.assertFalse(os.path.exists(empty_path))
+        self.assertFalse(os.path.exists(self.directory_path))
+
+        with self.assertRaises(FileNotFoundError):
+            self.fs_repository.remove_directory(self.missing_path)
+
+
+class TestReadProcfile(unittest.TestCase):
+
+    def test_read_procfile_matches_read_file(self):
+        """
+        Reading /proc/mounts with raw reads should give the same content as a normal read
+        """
+        fs_repository = FileSystemRepository()
+
+        self.assertEqual(fs_repository.read_file("/proc/mounts"), fs_repository.read_procfile("/proc/mounts"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,8 @@ import re
 import unittest
 from unittest.mock import MagicMock, mock_open, patch
 
+from pyfstab import Fstab
+
 from app.enums.enums import MountType
 from app.exceptions.mount_exception import MountException
 from app.factories.fake_mount_factory import FakeMountFactory
@@ -45,16 +47,41 @@ class TestHelper:
         # Create a mock file system repository
         mock_fs_repository = MagicMock(spec=FileSystemRepositoryInterface)
 
+        # Keep track of the file contents, so writes and appends are seen by later reads
+        mock_fs_repository.files = {
+            config_values["FSTAB_LOCATION"]: fstab_content,
+            config_values["PROC_MOUNTS_LOCATION"]: proc_content
+        }
+
         # Create a side effect for the read_file method
         def read_file_side_effect(file_path):
-            if file_path == config_values["FSTAB_LOCATION"]:
-                return fstab_content
-            elif file_path == config_values["PROC_MOUNTS_LOCATION"]:
-                return proc_content
-            return ""
+            return mock_fs_repository.files.get(file_path, "")
+
+        # Create side effects for the write methods
+        def write_file_side_effect(file_path, content):
+            mock_fs_repository.files[file_path] = content
+
+        def rewrite_file_side_effect(file_path, transform):
+            content = read_file_side_effect(file_path)
+            new_content = transform(content)
+            if new_content == content:
+                return False
+            mock_fs_repository.write_file(file_path, new_content)
+            return True
+
+        def append_lines_side_effect(file_path, lines):
+            mock_fs_repository.files[file_path] = read_file_side_effect(file_path) + "".join(
+                f"{line}\n" for line in lines
+            )
 
-        # Set the side effect for the read_file method
+        # Set the side effect for the read and write methods
         mock_fs_repository.read_file.side_effect = read_file_side_effect
+        mock_fs_repository.read_file_cached.side_effect = read_file_side_effect
+        mock_fs_repository.read_procfile.side_effect = read_file_side_effect
+
+        mock_fs_repository.write_file.side_effect = write_file_side_effect
+        mock_fs_repository.rewrite_file.side_effect = rewrite_file_side_effect
+        mock_fs_repository.append_lines.side_effect = append_lines_side_effect
 
         # Mock a config manager
         mock_config_manager = MagicMock(spec=ConfigManager)
@@ -125,6 +152,13 @@ class TestHelper:
         """
         return mock_fs_repository.write_file.call_args[0][1]
 
+    @staticmethod
+    def get_fstab_content(mock_fs_repository):
+        """
+        Get the current content of the fstab file, after any writes or appends
+        """
+        return mock_fs_repository.files[TestHelper.default_config_values["FSTAB_LOCATION"]]
+
 
 class TestStoreMountInformation(unittest.TestCase):
 
@@ -161,7 +195,7 @@ class TestStoreMountInformation(unittest.TestCase):
         """
 
         # Assert the content was written correctly
-        actual = TestHelper.get_last_write_content(fstab_repository.fs_repository)
+        actual = TestHelper.get_fstab_content(fstab_repository.fs_repository)
         self.assertTrue(
             TestHelper.compare_file_contents(expected_content, actual)
         )
@@ -201,7 +235,7 @@ class TestStoreMountInformation(unittest.TestCase):
             """
 
         # Assert the content was written correctly
-        actual = TestHelper.get_last_write_content(fstab_repository.fs_repository)
+        actual = TestHelper.get_fstab_content(fstab_repository.fs_repository)
         self.assertTrue(
             TestHelper.compare_file_contents(expected_content, actual)
         )
@@ -261,6 +295,77 @@ class TestStoreMountInformation(unittest.TestCase):
             TestHelper.compare_file_contents(expected_content, actual)
         )
 
+    def test_store_mount_information_many_writes_once(self):
+        """
+        This test will simulate storing several mounts and ensure
+        the new entries are appended to the fstab file in one go
+        """
+
+        fstab_content = f"""
+            {TestHelper.windows_fstab_line("/mnt/windows", "/shares/windows1")}
+            """
+
+        fstab_repository = TestHelper.setup_mock_fstab_repository(
+            fstab_content=fstab_content
+        )
+
+        # Create our mounts
+        mounts = [
+            FakeMountFactory.windows_mount(mount_path="/shares/windows2", actual_path="/mnt/windows2"),
+            FakeMountFactory.windows_mount(mount_path="/shares/windows3", actual_path="/mnt/windows3")
+        ]
+
+        # Run the store the mount information method
+        fstab_repository.store_mount_information_many(mounts)
+
+        expected_content = f"""
+            {TestHelper.windows_fstab_line("/mnt/windows", "/shares/windows1")}
+            {TestHelper.windows_fstab_line("/mnt/windows2", "/shares/windows2")}
+            {TestHelper.windows_fstab_line("/mnt/windows3", "/shares/windows3")}
+            """
+
+        # Assert the content was written correctly, in a single append
+        self.assertEqual(fstab_repository.fs_repository.append_lines.call_count, 1)
+        fstab_repository.fs_repository.write_file.assert_not_called()
+        actual = TestHelper.get_fstab_content(fstab_repository.fs_repository)
+        self.assertTrue(
+            TestHelper.compare_file_contents(expected_content, actual)
+        )
+
+    def test_store_mount_information_many_unsupported_mount_type(self):
+        """
+        This test ensures nothing is written if any of the mounts are unsupported
+        """
+
+        fstab_repository = TestHelper.setup_mock_fstab_repository()
+
+        mounts = [FakeMountFactory.windows_mount(), FakeMountFactory.standard_mount()]
+
+        with self.assertRaises(MountException):
+            fstab_repository.store_mount_information_many(mounts)
+
+        fstab_repository.fs_repository.write_file.assert_not_called()
+        fstab_repository.fs_repository.append_lines.assert_not_called()
+
+    def test_store_existing_mount_does_not_write(self):
+        """
+        Storing a mount that is already in the fstab shouldn't change the file
+        """
+
+        fstab_content = f"""
+            {TestHelper.windows_fstab_line("/mnt/windows", "/shares/windows1")}
+            """
+
+        fstab_repository = TestHelper.setup_mock_fstab_repository(
+            fstab_content=fstab_content
+        )
+
+        mount = FakeMountFactory.windows_mount(mount_path="/shares/windows1", actual_path="/mnt/windows")
+        fstab_repository.store_mount_information(mount)
+
+        fstab_repository.fs_repository.write_file.assert_not_called()
+        fstab_repository.fs_repository.append_lines.assert_not_called()
+
 
 class TestRemoveMountInformation(unittest.TestCase):
 
@@ -353,15 +458,33 @@ class TestRemoveMountInformation(unittest.TestCase):
         # Run the store the mount information method
         fstab_repository.remove_mount_information(mount.mount_path)
 
-        # Assert the content was written correctly
-        expected_content = ""
+        # Assert nothing was written as there was nothing to remove
+        fstab_repository.fs_repository.write_file.assert_not_called()
+        self.assertEqual("", TestHelper.get_fstab_content(fstab_repository.fs_repository))
 
-        # Assert the content was written correctly
-        actual = TestHelper.get_last_write_content(fstab_repository.fs_repository)
-        self.assertTrue(
-            TestHelper.compare_file_contents(expected_content, actual)
+    def test_remove_mount_information_keeps_other_lines(self):
+        """
+        Removing a mount should only drop its own line, leaving comments and other entries untouched
+        """
+
+        fstab_content = (
+            "# /shares/windows1 is managed by mounty\n"
+            f"{TestHelper.windows_fstab_line('/mnt/windows', '/shares/windows1')}\n"
+            f"{TestHelper.linux_fstab_line('/mnt/linux', '/shares/linux1')}\n"
+        )
+
+        fstab_repository = TestHelper.setup_mock_fstab_repository(
+            fstab_content=fstab_content
         )
 
+        fstab_repository.remove_mount_information("/shares/windows1")
+
+        expected_content = (
+            "# /shares/windows1 is managed by mounty\n"
+            f"{TestHelper.linux_fstab_line('/mnt/linux', '/shares/linux1')}\n"
+        )
+        self.assertEqual(expected_content, TestHelper.get_fstab_content(fstab_repository.fs_repository))
+
 
 class TestRemoveMounts(unittest.TestCase):
 
@@ -435,14 +558,9 @@ class TestRemoveMounts(unittest.TestCase):
         # Call the remove mounts method
         fstab_repository.remove_mounts(mounts)
 
-        expected = ""
-
-        # Fetch the last content that was written to the write file method
-        actual = TestHelper.get_last_write_content(fstab_repository.fs_repository)
-
-        self.assertTrue(
-            TestHelper.compare_file_contents(expected, actual)
-        )
+        # Assert nothing was written as there was nothing to remove
+        fstab_repository.fs_repository.write_file.assert_not_called()
+        self.assertEqual("", TestHelper.get_fstab_content(fstab_repository.fs_repository))
 
     def test_remove_multiple_mounts_only_some_missing_mounts(self):
         """
@@ -491,6 +609,125 @@ class TestRemoveMounts(unittest.TestCase):
         )
 
 
+class TestReplaceMounts(unittest.TestCase):
+
+    def test_replace_mounts(self):
+        """
+        This test will simulate replacing mounts, the old entries for the mount paths
+        should be swapped for the new ones in a single write
+        """
+
+        fstab_content = f"""
+            {TestHelper.windows_fstab_line("/mnt/windows", "/shares/windows1")}
+            {TestHelper.linux_fstab_line("/mnt/linux", "/shares/linux1")}
+            """
+
+        fstab_repository = TestHelper.setup_mock_fstab_repository(
+            fstab_content=fstab_content
+        )
+
+        mounts = [FakeMountFactory.windows_mount(mount_path="/shares/windows1", actual_path="/mnt/windows_new")]
+
+        fstab_repository.replace_mounts(mounts)
+
+        expected_content = f"""
+            {TestHelper.linux_fstab_line("/mnt/linux", "/shares/linux1")}
+            {TestHelper.windows_fstab_line("/mnt/windows_new", "/shares/windows1")}
+            """
+
+        self.assertEqual(1, fstab_repository.fs_repository.write_file.call_count)
+        actual = TestHelper.get_fstab_content(fstab_repository.fs_repository)
+        self.assertTrue(
+            TestHelper.compare_file_contents(expected_content, actual)
+        )
+
+
+class TestGetAllSystemMounts(unittest.TestCase):
+
+    def test_get_all_system_mounts_removes_duplicates(self):
+        """
+        Duplicate fstab entries should only give one mount
+        """
+
+        fstab_content = f"""
+            {TestHelper.windows_fstab_line("/mnt/windows", "/shares/windows1")}
+            {TestHelper.linux_fstab_line("/mnt/linux", "/shares/linux1")}
+            {TestHelper.windows_fstab_line("/mnt/windows", "/shares/windows1")}
+            """
+
+        fstab_repository = TestHelper.setup_mock_fstab_repository(
+            fstab_content=fstab_content
+        )
+
+        mounts = fstab_repository.get_all_system_mounts()
+
+        self.assertEqual(["/shares/windows1", "/shares/linux1"], [mount.mount_path for mount in mounts])
+
+    def test_get_system_mounts_with_prefix(self):
+        """
+        Only mounts under the prefix should be returned
+        """
+
+        fstab_content = f"""
+            # /shares/commented out
+            UUID=1234 / ext4 defaults 0 1
+            {TestHelper.windows_fstab_line("/mnt/windows", "/shares/windows1")}
+            {TestHelper.linux_fstab_line("/mnt/linux", "/shares/linux1")}
+            {TestHelper.windows_fstab_line("/mnt/windows", "/shares/windows1")}
+            """
+
+        fstab_repository = TestHelper.setup_mock_fstab_repository(
+            fstab_content=fstab_content
+        )
+
+        mounts = fstab_repository.get_system_mounts_with_prefix("/shares")
+
+        self.assertEqual(["/shares/windows1", "/shares/linux1"], [mount.mount_path for mount in mounts])
+
+    def test_get_system_mounts_does_not_parse_entries(self):
+        """
+        Reading the mounts should split the lines directly, without building pyfstab entries
+        """
+
+        fstab_content = f"""
+            {TestHelper.windows_fstab_line("/mnt/windows", "/shares/windows1")}
+            not a valid line
+            """
+
+        fstab_repository = TestHelper.setup_mock_fstab_repository(
+            fstab_content=fstab_content
+        )
+
+        with patch.object(Fstab, "read_string", autospec=True) as read_string:
+            all_mounts = fstab_repository.get_all_system_mounts()
+            prefixed_mounts = fstab_repository.get_system_mounts_with_prefix("/shares")
+
+        read_string.assert_not_called()
+        self.assertEqual(["/shares/windows1"], [mount.mount_path for mount in all_mounts])
+        self.assertEqual(all_mounts, prefixed_mounts)
+
+    def test_unchanged_fstab_is_only_parsed_once(self):
+        """
+        Reading an unchanged fstab again should reuse the parsed entries, without sharing the entry list
+        """
+
+        fstab_content = f"""
+            {TestHelper.windows_fstab_line("/mnt/windows", "/shares/windows1")}
+            """
+
+        fstab_repository = TestHelper.setup_mock_fstab_repository(
+            fstab_content=fstab_content
+        )
+
+        with patch.object(Fstab, "read_string", autospec=True, side_effect=Fstab.read_string) as read_string:
+            first = fstab_repository._read_fstab_raw()
+            first.entries.clear()
+            second = fstab_repository._read_fstab_raw()
+
+        self.assertEqual(1, read_string.call_count)
+        self.assertEqual(1, len(second.entries))
+
+
 class TestIsMounted(unittest.TestCase):
 
     def test_is_mounted_true(self):
@@ -534,6 +771,45 @@ class TestIsMounted(unittest.TestCase):
 
         self.assertFalse(is_mounted)
 
+    def test_is_mounted_many(self):
+        """
+        This test will simulate checking several mounts at once
+        """
+
+        # Mock the proc file content
+        proc_content = f"""
+            {TestHelper.windows_fstab_line("/mnt/windowserver1", "/shares/windows1")}
+            {TestHelper.linux_fstab_line("/mnt/linuxserver1", "/shares/linux1")}
+            """
+
+        fstab_repository = TestHelper.setup_mock_fstab_repository(
+            proc_content=proc_content
+        )
+
+        # Check which of the mounts are mounted
+        mounted = fstab_repository.is_mounted_many(["/shares/windows1", "/shares/linux1", "/shares/windows3"])
+
+        self.assertDictEqual(
+            {"/shares/windows1": True, "/shares/linux1": True, "/shares/windows3": False},
+            mounted
+        )
+
+        # The proc file should only have been read once
+        fstab_repository.fs_repository.read_procfile.assert_called_once_with("/proc/mounts")
+
+
+class TestSanitizePath(unittest.TestCase):
+
+    def test_sanitize_path(self):
+        """
+        New lines should be removed, backslashes converted and spaces escaped
+        """
+        fstab_repository = TestHelper.setup_mock_fstab_repository()
+
+        sanitized = fstab_repository._sanitize_path("\\\\server\\my share\r\n")
+
+        self.assertEqual("//server/my\\040share", sanitized)
+
 
 class TestCleanup(unittest.TestCase):
 
@@ -576,6 +852,24 @@ class TestCleanup(unittest.TestCase):
             TestHelper.compare_file_contents(expected_content, actual)
         )
 
+    def test_cleanup_nothing_to_remove(self):
+        """
+        If every entry is mounted and there are no duplicates, the fstab shouldn't be rewritten
+        """
+
+        fstab_content = f"""
+            {TestHelper.windows_fstab_line("/mnt/windowserver1", "/shares/windows1")}
+            {TestHelper.linux_fstab_line("/mnt/linuxserver1", "/shares/linux1")}
+            """
+
+        fstab_repository = TestHelper.setup_mock_fstab_repository(
+            fstab_content=fstab_content
+        )
+
+        fstab_repository.cleanup()
+
+        fstab_repository.fs_repository.write_file.assert_not_called()
+
 
 if __name__ == '__main__':
     unittest.main()
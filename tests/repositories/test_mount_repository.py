@@ -1,9 +1,10 @@
 import json
 import unittest
-from unittest.mock import MagicMock, patch, mock_open
+from unittest.mock import ANY, MagicMock, call, patch, mock_open
 
 from app.enums.enums import MountType
 from app.exceptions.cleanup_exception import CleanupException
+from app.exceptions.config_exception import ConfigException
 from app.exceptions.mount_exception import MountException
 from app.exceptions.unmount_exception import UnmountException
 from app.models.mount import Mount
@@ -23,6 +24,7 @@ class TestHelper:
         "LINUX_SSH_USER": "dave",
         "CIFS_DOMAIN": "ONS",
         "DESIRED_MOUNTS_FILE_PATH": "mounts.json",
+        "MOUNT_PARALLELISM": 1,
     }
 
     @staticmethod
@@ -61,19 +63,24 @@ class TestHelper:
         # Create a mock file system repository
         mock_fs_repository = MagicMock(spec=FileSystemRepositoryInterface)
 
-        def read_file_side_effect(file_path):
+        def read_file_bytes_side_effect(file_path):
             if file_path == config_values["DESIRED_MOUNTS_FILE_PATH"]:
-                return mounts_content
-            return ""
+                return mounts_content.encode("utf-8")
+            return b""
 
-        # Set the side effect for the read_file method
-        mock_fs_repository.read_file.side_effect = read_file_side_effect
+        # Set the side effect for the read_file_bytes method
+        mock_fs_repository.read_file_bytes.side_effect = read_file_bytes_side_effect
 
-        # Create a MountRepository
+        # Mount points start off missing
+        mock_fs_repository.probe_directory.return_value = (False, True)
+
+        # Create a MountRepository, always running umount so the tests don't depend on being root
         return MountRepository(
             mock_config_manager,
             mock_config_repository,
-            mock_fs_repository
+            mock_fs_repository,
+            use_syscalls=False,
+            use_sudo=True
         )
 
     @staticmethod
@@ -88,8 +95,14 @@ class TestHelper:
         """
         mock_config_repository = MagicMock(spec=MountConfigRepositoryInterface)
         mock_config_repository.get_all_system_mounts.return_value = system_mounts or []
+        mock_config_repository.get_system_mounts_with_prefix.side_effect = lambda prefix: [
+            mount for mount in system_mounts or [] if mount.mount_path.startswith(prefix)
+        ]
         mock_config_repository.remove_mounts.return_value = remove_failures or []
         mock_config_repository.is_mounted.return_value = is_mounted
+        mock_config_repository.is_mounted_many.side_effect = lambda mount_paths: {
+            mount_path: mock_config_repository.is_mounted(mount_path) for mount_path in mount_paths
+        }
         return mock_config_repository
 
 
@@ -232,6 +245,17 @@ class TestGetDesiredMounts(unittest.TestCase):
         current_mounts = mount_repo.get_desired_mounts()
         self.assertListEqual(expected, current_mounts)
 
+    def test_get_desired_mounts_invalid_json(self):
+        """
+        An invalid desired mounts file should raise a config error, whichever JSON parser is used
+        """
+        mount_repo = TestHelper.setup_mock_config_repo(mounts_content="[{")
+
+        with self.assertRaises(ConfigException) as context:
+            mount_repo.get_desired_mounts()
+
+        self.assertIsInstance(context.exception.__cause__, ValueError)
+
 
 class TestGetOrphanMounts(unittest.TestCase):
 
@@ -270,6 +294,28 @@ class TestGetOrphanMounts(unittest.TestCase):
             orphan_mounts
         )
 
+    def test_get_current_and_orphan_mounts(self):
+        """
+        The current and orphan mounts should be split from a single read of the config and mounted check.
+        """
+
+        system_mounts = [
+            Mount(mount_path="/shares/our/share/1", actual_path="//SomeServer/Somewhere"),
+            Mount(mount_path="/shares/orphan/path", actual_path="//Secret/share"),
+        ]
+
+        mount_repo = TestHelper.setup_mock_config_repo(
+            system_mounts=system_mounts,
+        )
+        mount_repo.mount_config_repository.is_mounted.side_effect = lambda path: path != "/shares/orphan/path"
+
+        current_mounts, orphan_mounts = mount_repo.get_current_and_orphan_mounts()
+
+        self.assertListEqual([system_mounts[0]], current_mounts)
+        self.assertListEqual([system_mounts[1]], orphan_mounts)
+        mount_repo.mount_config_repository.get_system_mounts_with_prefix.assert_called_once()
+        mount_repo.mount_config_repository.is_mounted_many.assert_called_once()
+
 
 class TestMount(unittest.TestCase):
     def setUp(self):
@@ -301,9 +347,25 @@ class TestMount(unittest.TestCase):
         # Assert the mount information was saved
         self.mount_repo.mount_config_repository.store_mount_information.assert_called_once_with(self.test_mount)
         mock_subprocess_run.assert_called_once_with(
-            ["sudo", "mount", "/shares/example"], capture_output=True
+            ["sudo", "mount", "/shares/example"], capture_output=True, env=ANY
         )
 
+        # mount is run with a minimal environment rather than ours
+        self.assertEqual("C", mock_subprocess_run.call_args.kwargs["env"]["LC_ALL"])
+
+    @patch("subprocess.run")
+    def test_mount_without_sudo(self, mock_subprocess_run):
+        """
+        When sudo isn't needed, mount should be run directly.
+        """
+
+        mock_subprocess_run.return_value = MagicMock(returncode=0)
+        self.mount_repo._command_prefix = ()
+
+        self.mount_repo.mount(self.test_mount)
+
+        mock_subprocess_run.assert_called_once_with(["mount", "/shares/example"], capture_output=True, env=ANY)
+
     @patch("subprocess.run")
     def test_mount_raises_exception(self, mock_subprocess_run):
         """
@@ -325,12 +387,173 @@ class TestMount(unittest.TestCase):
         # Ensure the mount operation returns 0
         mock_subprocess_run.return_value = MagicMock(returncode=0)
 
-        # Mock the directory_empty method to return False
-        self.mount_repo.fs_repository.directory_empty.return_value = False
+        # Mock the mount point existing with files in
+        self.mount_repo.fs_repository.probe_directory.return_value = (True, False)
+
+        with self.assertRaises(MountException):
+            self.mount_repo.mount(self.test_mount)
+
+    @patch("subprocess.run")
+    def test_mount_checks_is_mounted_once(self, mock_subprocess_run):
+        """
+        Whether the mount point is mounted should only be checked once per mount.
+        """
+
+        mock_subprocess_run.return_value = MagicMock(returncode=0)
+
+        self.mount_repo.mount(self.test_mount)
+        self.assertEqual(1, self.mount_repo.mount_config_repository.is_mounted.call_count)
+
+        # Several mounts are all checked with one call
+        self.mount_repo.mount_many([self.test_mount, self.test_mount])
+        self.mount_repo.mount_config_repository.is_mounted_many.assert_called_once_with(
+            ["/shares/example", "/shares/example"]
+        )
+
+    @patch("subprocess.run")
+    def test_mount_many_runs_mount_for_each_path(self, mock_subprocess_run):
+        """
+        Each mount should be mounted with its own sudo mount call, with failures attributed to their mounts.
+        """
+
+        second_mount = Mount(
+            mount_path="/shares/example2",
+            actual_path="//someServer/someShare2",
+            mount_type=MountType.WINDOWS,
+        )
+
+        # The second mount fails
+        mock_subprocess_run.side_effect = lambda args, **kwargs: MagicMock(
+            returncode=32 if args[-1] == "/shares/example2" else 0, stderr=b"mount error(2)"
+        )
+
+        failed = self.mount_repo.mount_many([self.test_mount, second_mount])
+
+        self.assertEqual([second_mount], failed)
+        self.assertEqual(
+            [
+                call(["sudo", "mount", "/shares/example"], capture_output=True, env=ANY),
+                call(["sudo", "mount", "/shares/example2"], capture_output=True, env=ANY),
+            ],
+            mock_subprocess_run.call_args_list
+        )
+
+    @patch("subprocess.run")
+    def test_mount_many_in_parallel_batches(self, mock_subprocess_run):
+        """
+        Without sudo and with more than one batch allowed, every mount should still get its own mount call.
+        """
+
+        mounts = [
+            Mount(
+                mount_path=f"/shares/example{i}",
+                actual_path=f"//someServer/someShare{i}",
+                mount_type=MountType.WINDOWS,
+            )
+            for i in range(3)
+        ]
+        self.mount_repo.mount_parallelism = 2
+        self.mount_repo._command_prefix = ()
+
+        # Every mount fails, so each mount should only be reported once
+        mock_subprocess_run.return_value = MagicMock(returncode=32, stderr=b"error")
+
+        failed = self.mount_repo.mount_many(mounts)
+
+        self.assertEqual(mounts, failed)
+        self.assertCountEqual(
+            [["mount", mount.mount_path] for mount in mounts],
+            [batch.args[0] for batch in mock_subprocess_run.call_args_list]
+        )
+
+    @patch("subprocess.run")
+    def test_mount_many_with_sudo_runs_one_batch(self, mock_subprocess_run):
+        """
+        With sudo, mounts should be run one after another so only one password prompt can be open at once.
+        """
+
+        self.mount_repo.mount_parallelism = 4
+        mock_subprocess_run.return_value = MagicMock(returncode=0)
+
+        with patch("app.repositories.mount_repository.ThreadPoolExecutor") as mock_executor:
+            self.mount_repo.mount_many([self.test_mount, self.test_mount])
+
+        mock_executor.assert_not_called()
+        self.assertEqual(2, mock_subprocess_run.call_count)
+
+    def test_mount_parallelism_defaults(self):
+        """
+        A missing or string parallelism setting should still give a usable whole number.
+        """
+
+        for value, expected in [(None, 4), ("3", 3), (0, 4), ("-2", 1)]:
+            config_manager = MagicMock(spec=ConfigManager)
+            config_manager.get_config.side_effect = lambda key: value if key == "MOUNT_PARALLELISM" else None
+
+            mount_repo = MountRepository(
+                config_manager,
+                MagicMock(spec=MountConfigRepositoryInterface),
+                MagicMock(spec=FileSystemRepositoryInterface),
+                use_syscalls=False,
+                use_sudo=True
+            )
+
+            self.assertEqual(expected, mount_repo.mount_parallelism)
+
+    @patch("subprocess.run")
+    def test_mount_many_sudo_failure(self, mock_subprocess_run):
+        """
+        If sudo refuses to run mount, the mount should fail.
+        """
+
+        mock_subprocess_run.return_value = MagicMock(returncode=1, stderr=b"sudo: a password is required")
+
+        failed = self.mount_repo.mount_many([self.test_mount])
+
+        self.assertEqual([self.test_mount], failed)
+
+    @patch("subprocess.run")
+    def test_mount_creates_missing_mount_point(self, mock_subprocess_run):
+        """
+        A missing mount point should be created, found missing by the same check that looks for contents.
+        """
+
+        mock_subprocess_run.return_value = MagicMock(returncode=0)
+
+        self.mount_repo.mount(self.test_mount)
+
+        self.mount_repo.fs_repository.probe_directory.assert_called_once_with("/shares/example")
+        self.mount_repo.fs_repository.create_directory.assert_called_once_with("/shares/example")
+        self.mount_repo.fs_repository.directory_exists.assert_not_called()
+        self.mount_repo.fs_repository.directory_empty.assert_not_called()
+
+    @patch("subprocess.run")
+    def test_mount_reuses_existing_mount_point(self, mock_subprocess_run):
+        """
+        An existing empty mount point shouldn't be created again.
+        """
+
+        mock_subprocess_run.return_value = MagicMock(returncode=0)
+        self.mount_repo.fs_repository.probe_directory.return_value = (True, True)
+
+        self.mount_repo.mount(self.test_mount)
+
+        self.mount_repo.fs_repository.create_directory.assert_not_called()
+        mock_subprocess_run.assert_called_once()
+
+    @patch("subprocess.run")
+    def test_mount_point_creation_failure(self, mock_subprocess_run):
+        """
+        A failure to create the mount point should raise a MountException.
+        """
+
+        self.mount_repo.fs_repository.create_directory.side_effect = PermissionError("Permission denied")
 
         with self.assertRaises(MountException):
             self.mount_repo.mount(self.test_mount)
 
+        mock_subprocess_run.assert_not_called()
+
 
 class TestUnmount(unittest.TestCase):
 
@@ -386,6 +609,78 @@ class TestUnmount(unittest.TestCase):
         with self.assertRaises(UnmountException):
             self.mount_repo.unmount("/shares/example")
 
+    @patch("subprocess.run")
+    @patch("app.repositories.mount_repository._get_umount2")
+    def test_unmount_with_syscall(self, mock_get_umount2, mock_subprocess_run):
+        """
+        Simulates an unmount using the umount2 syscall, umount shouldn't be run
+        """
+        self.mount_repo.use_syscalls = True
+        mock_get_umount2.return_value.return_value = 0
+
+        self.mount_repo.unmount("/shares/example")
+
+        mock_get_umount2.return_value.assert_called_once_with(b"/shares/example", 0)
+        mock_subprocess_run.assert_not_called()
+
+    @patch("subprocess.run")
+    @patch("app.repositories.mount_repository._get_umount2")
+    def test_unmount_with_syscall_failure(self, mock_get_umount2, mock_subprocess_run):
+        """
+        Simulates a failed umount2 syscall
+        """
+        self.mount_repo.use_syscalls = True
+        mock_get_umount2.return_value.return_value = -1
+
+        with self.assertRaises(UnmountException):
+            self.mount_repo.unmount("/shares/example")
+
+
+class TestUpdateMany(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Common setup for all update tests.
+        """
+        self.mount_repo = TestHelper.setup_mock_config_repo(
+            is_mounted=True
+        )
+
+        self.test_mounts = [
+            Mount(mount_path="/shares/example1", actual_path="//someServer/newShare1", mount_type=MountType.WINDOWS),
+            Mount(mount_path="/shares/example2", actual_path="//someServer/newShare2", mount_type=MountType.WINDOWS)
+        ]
+
+    @patch("subprocess.run")
+    def test_update_many_success(self, mock_subprocess_run):
+        """
+        Simulates updating several mounts, the mount information should be replaced in one go
+        """
+
+        mock_subprocess_run.return_value = MagicMock(returncode=0)
+
+        failed = self.mount_repo.update_many(self.test_mounts)
+
+        self.assertEqual([], failed)
+        self.mount_repo.mount_config_repository.replace_mounts.assert_called_once_with(self.test_mounts)
+
+        # The mounts are unmounted with one call then mounted again one at a time, keeping their mount points
+        self.assertEqual(3, mock_subprocess_run.call_count)
+        self.mount_repo.fs_repository.remove_directory.assert_not_called()
+
+    @patch("subprocess.run")
+    def test_update_many_unmount_failure(self, mock_subprocess_run):
+        """
+        Simulates an update where the existing mounts can't be unmounted
+        """
+
+        mock_subprocess_run.return_value = MagicMock(returncode=2)
+
+        failed = self.mount_repo.update_many(self.test_mounts)
+
+        self.assertEqual(self.test_mounts, failed)
+        self.mount_repo.mount_config_repository.replace_mounts.assert_not_called()
+
 
 class TestUnmountAll(unittest.TestCase):
 
@@ -412,7 +707,7 @@ class TestUnmountAll(unittest.TestCase):
         self.mount_repo.get_current_mounts = MagicMock(return_value=mounts_to_unmount)
 
         # Make the unmount operations successful
-        self.mount_repo._perform_unmount = MagicMock(return_value=True)
+        self.mount_repo._perform_unmount_many = MagicMock(return_value={})
         self.mount_repo._remove_mount_point = MagicMock(return_value=True)
 
         # Call unmount_all
@@ -436,8 +731,8 @@ class TestUnmountAll(unittest.TestCase):
         self.mount_repo.get_current_mounts = MagicMock(return_value=mounts_to_unmount)
 
         # Simulate a failure on the second mount
-        self.mount_repo._perform_unmount = MagicMock(
-            side_effect=[None, UnmountException("Unmount failed for some reason")]
+        self.mount_repo._perform_unmount_many = MagicMock(
+            return_value={"/shares/our/share/2": "Unmount failed for some reason"}
         )
         self.mount_repo._remove_mount_point = MagicMock(return_value=True)
 
@@ -461,6 +756,131 @@ class TestUnmountAll(unittest.TestCase):
         # Assert that the returned list is empty
         self.assertListEqual(failed_mounts, [])
 
+        # Assert the config wasn't touched
+        self.mount_repo.mount_config_repository.remove_mounts.assert_not_called()
+
+    def test_unmount_all_remove_mount_point_failure(self):
+        """
+        Test the unmount_all method when a mount point can't be removed after unmounting
+        """
+
+        mounts_to_unmount = [
+            Mount(mount_path="/shares/our/share/1", actual_path="//SomeServer/Somewhere"),
+            Mount(mount_path="/shares/our/share/2", actual_path="//SomeServer/Somewhere")
+        ]
+        self.mount_repo.get_current_mounts = MagicMock(return_value=mounts_to_unmount)
+        self.mount_repo._perform_unmount_many = MagicMock(return_value={})
+
+        # Fail to remove the first mount point
+        def remove_directory(path):
+            if path == "/shares/our/share/1":
+                raise OSError("Directory not empty")
+
+        self.mount_repo.fs_repository.remove_directory.side_effect = remove_directory
+
+        failed_mounts = self.mount_repo.unmount_all()
+
+        self.assertListEqual(failed_mounts, [mounts_to_unmount[0]])
+
+    @patch("subprocess.run")
+    def test_unmount_all_uses_one_umount_call(self, mock_subprocess_run):
+        """
+        Test all the mounts are unmounted with a single umount call
+        """
+
+        mounts_to_unmount = [
+            Mount(mount_path="/shares/our/share/1", actual_path="//SomeServer/Somewhere"),
+            Mount(mount_path="/shares/our/share/2", actual_path="//SomeServer/Somewhere")
+        ]
+        self.mount_repo.get_current_mounts = MagicMock(return_value=mounts_to_unmount)
+        mock_subprocess_run.return_value = MagicMock(returncode=0)
+
+        failed_mounts = self.mount_repo.unmount_all()
+
+        self.assertListEqual(failed_mounts, [])
+        mock_subprocess_run.assert_called_once_with(
+            ["sudo", "umount", "/shares/our/share/1", "/shares/our/share/2"], capture_output=True, env=ANY
+        )
+
+    @patch("subprocess.run")
+    def test_unmount_all_failure_only_fails_mounts_still_mounted(self, mock_subprocess_run):
+        """
+        If umount fails, only the mounts that are still mounted should be reported as failed
+        """
+
+        mounts_to_unmount = [
+            Mount(mount_path="/shares/our/share/1", actual_path="//SomeServer/Somewhere"),
+            Mount(mount_path="/shares/our/share/2", actual_path="//SomeServer/Somewhere")
+        ]
+        self.mount_repo.get_current_mounts = MagicMock(return_value=mounts_to_unmount)
+        mock_subprocess_run.return_value = MagicMock(returncode=32, stderr="target is busy")
+        self.mount_repo.mount_config_repository.is_mounted.side_effect = lambda path: path == "/shares/our/share/2"
+
+        failed_mounts = self.mount_repo.unmount_all()
+
+        self.assertListEqual(failed_mounts, [mounts_to_unmount[1]])
+
+
+class TestUnmountMany(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Common setup for all unmount_many tests.
+        """
+        self.mount_repo = TestHelper.setup_mock_config_repo(
+            is_mounted=True
+        )
+
+    def test_unmount_many_removes_fstab_entries_once(self):
+        """
+        Test that unmount_many removes the fstab entries of all mounts with a single call.
+        """
+
+        mounts_to_unmount = [
+            Mount(mount_path="/shares/our/share/1", actual_path="//SomeServer/Somewhere"),
+            Mount(mount_path="/shares/our/share/2", actual_path="//SomeServer/Somewhere")
+        ]
+
+        self.mount_repo._perform_unmount_many = MagicMock(return_value={})
+        self.mount_repo._remove_mount_point = MagicMock(return_value=True)
+
+        failed_mounts = self.mount_repo.unmount_many(mounts_to_unmount)
+
+        self.assertListEqual(failed_mounts, [])
+        self.mount_repo.mount_config_repository.remove_mounts.assert_called_once_with(mounts_to_unmount)
+
+    def test_unmount_many_empty(self):
+        """
+        Test that unmount_many does not touch the fstab when there is nothing to unmount.
+        """
+
+        self.mount_repo._perform_unmount_many = MagicMock(return_value={})
+
+        self.assertListEqual(self.mount_repo.unmount_many([]), [])
+        self.mount_repo.mount_config_repository.remove_mounts.assert_not_called()
+
+    @patch("subprocess.run")
+    @patch("app.repositories.mount_repository._get_umount2")
+    def test_unmount_many_with_syscalls(self, mock_get_umount2, mock_subprocess_run):
+        """
+        Each mount should be unmounted with its own umount2 call, and only the failed ones reported
+        """
+
+        mounts_to_unmount = [
+            Mount(mount_path="/shares/our/share/1", actual_path="//SomeServer/Somewhere"),
+            Mount(mount_path="/shares/our/share/2", actual_path="//SomeServer/Somewhere")
+        ]
+
+        self.mount_repo.use_syscalls = True
+        mock_get_umount2.return_value.side_effect = lambda path, flags: -1 if path.endswith(b"2") else 0
+        self.mount_repo._remove_mount_point = MagicMock(return_value=True)
+
+        failed_mounts = self.mount_repo.unmount_many(mounts_to_unmount)
+
+        self.assertListEqual(failed_mounts, [mounts_to_unmount[1]])
+        self.assertEqual(2, mock_get_umount2.return_value.call_count)
+        mock_subprocess_run.assert_not_called()
+
 
 class TestCleanup(unittest.TestCase):
 
@@ -1,5 +1,5 @@
 import unittest
-from unittest.mock import MagicMock, call
+from unittest.mock import MagicMock, call, patch
 
 from app.exceptions.mount_exception import MountException
 from app.exceptions.unmount_exception import UnmountException
@@ -24,6 +24,44 @@ def setup_mock_repository(desired_mounts: list[Mount] = None,
     mock_repository.get_desired_mounts.return_value = desired_mounts or []
     mock_repository.get_current_mounts.return_value = current_mounts or []
     mock_repository.unmount_all.return_value = unmount_failures or []
+    mock_repository.get_current_and_orphan_mounts.side_effect = lambda: (
+        mock_repository.get_current_mounts(), mock_repository.get_orphan_mounts()
+    )
+
+    # Mount many behaves like calling mount for each mount, so existing mount assertions still apply
+    def mount_many(mounts):
+        failed_mounts = []
+        for mount in mounts:
+            try:
+                mock_repository.mount(mount)
+            except MountException:
+                failed_mounts.append(mount)
+        return failed_mounts
+
+    # Unmount many behaves like calling unmount for each mount
+    def unmount_many(mounts):
+        failed_mounts = []
+        for mount in mounts:
+            try:
+                mock_repository.unmount(mount.mount_path)
+            except UnmountException:
+                failed_mounts.append(mount)
+        return failed_mounts
+
+    # Update many behaves like calling unmount then mount for each mount
+    def update_many(mounts):
+        failed_mounts = []
+        for mount in mounts:
+            try:
+                mock_repository.unmount(mount.mount_path)
+                mock_repository.mount(mount)
+            except (UnmountException, MountException):
+                failed_mounts.append(mount)
+        return failed_mounts
+
+    mock_repository.mount_many.side_effect = mount_many
+    mock_repository.unmount_many.side_effect = unmount_many
+    mock_repository.update_many.side_effect = update_many
     return mock_repository
 
 
@@ -255,6 +293,26 @@ class TestMountingServiceRun(unittest.TestCase):
         self.assertEqual(0, mock_repository.mount.call_count)
         self.assertEqual(1, mock_repository.unmount.call_count)
 
+    def test_changes_are_only_worked_out_once(self):
+        """
+        Each run should only compare the desired and current mounts once for each kind of change.
+        """
+        mock_repository = setup_mock_repository(
+            desired_mounts=[Mount(mount_path="/shares/test", actual_path="//SomeServer/Somewhere")],
+            current_mounts=[Mount(mount_path="/shares/test", actual_path="//SomeServer/Elsewhere")]
+        )
+
+        mounting_service = MountingService(mock_repository)
+
+        with patch.object(
+            mounting_service, "_find_mounts_to_update", wraps=mounting_service._find_mounts_to_update
+        ) as find_mounts_to_update:
+            self.assertTrue(mounting_service.dry_run())
+            self.assertTrue(mounting_service.run())
+
+        self.assertEqual(2, find_mounts_to_update.call_count)
+        self.assertEqual(1, mock_repository.update_many.call_count)
+
 
 class TestMountingServiceUnmountAll(unittest.TestCase):
 